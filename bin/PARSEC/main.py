@@ -1,63 +1,70 @@
-
 import csv
 import os
+import argparse
+import subprocess
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
-import configparser
-
-def setupDirectory(arch, bd, vc, bench):
-    print("Generating dirs")
-    print(os.path)
-    dirName = arch+'_vc_'+str(vc)+'_bd_'+str(bd)+'_'+bench
-    os.system('mkdir ' + dirName)
-    os.system('cp -r ../origin/sim ' + dirName)
-    os.system('mkdir ' + dirName +'/config')
-    os.system('cp -r ../origin/config/ntConfig.xml ' + dirName+'/config')
-    os.system('cp -r ../origin/config/'+arch+'.xml ' + dirName+'/config/network.xml')
-
-def execute(arch, bd, vc, bench):
-    dirName = arch + '_vc_' + str(vc) + '_bd_' + str(bd) + '_' + bench
-    os.chdir(dirName)
-    os.system('./sim')
-    os.chdir('..')
-
-
-def modifyFiles(arch, bd, vc, bench):
-    dirName = arch + '_vc_' + str(vc) + '_bd_' + str(bd) + '_' + bench
-    os.chdir(dirName+'/config')
-    #set benchmark
-    filedata = None
-    with open('ntConfig.xml', 'r') as file:
-        filedata = file.read()
-        file.close()
-    filedata = filedata.replace('BENCHMARK', '../../benchmarks/'+bench)
-    with open('ntConfig.xml', 'w') as file:
-        file.write(filedata)
-        file.close()
-
-    #set vc
-    # set bd
-    filedata = None
-    with open('network.xml', 'r') as file:
-        filedata = file.read()
-        file.close()
-    if (arch == 'heteroSynch'):
-        filedata = filedata.replace('<bufferDepth value=\"4\" />', '<bufferDepth value=\"'+str(bd)+'\"/>')
-        filedata = filedata.replace('<vcCount value=\"4\" />', '<vcCount value=\"' + str(vc) + '\"/>')
-    else:
-        filedata = filedata.replace('<bufferDepth value=\"4\"/>', '<bufferDepth value=\"'+str(bd)+'\"/>')
-        filedata = filedata.replace('<vcCount value=\"4\"/>', '<vcCount value=\"' + str(vc) + '\"/>')
-    with open('network.xml', 'w') as file:
-        file.write(filedata)
-        file.close()
 
-    #set clock speed
-    os.chdir('../..')
+architectures = ['homoSynch', 'homoAsynch', 'pseudo', 'heteroSynch']
+bds = [4, 8]
+vcs = [4, 8]
+benchmarks = ['blackscholes_64c_simmedium', 'bodytrack_64c_simlarge', 'canneal_64c_simmedium',
+              'dedup_64c_simmedium', 'ferret_64c_simmedium', 'fluidanimate_64c_simmedium',
+              'vips_64c_simmedium', 'x264_64c_simmedium']
+# The buffer depth and VC count of the network files in ../origin/config.
+# Only ports at these values are changed, so the single VC ports of the
+# upper layer of heteroSynch keep their VC count.
+baseBufferDepth = '4'
+baseVcCount = '4'
+
+
+def settingName(arch, bd, vc):
+    return arch + '_vc_' + str(vc) + '_bd_' + str(bd)
+
+
+def dirName(arch, bd, vc, bench):
+    return settingName(arch, bd, vc) + '_' + bench
+
+
+def writeNetwork(srcFile, dstFile, bd, vc):
+    """
+    Write the network file of a variant, as vcModder.py does.
+    Parameters:
+        - srcFile: the network file of the architecture.
+        - dstFile: the network file of the variant.
+        - bd: the buffer depth.
+        - vc: the number of VCs.
+    """
+    et = ET.parse(srcFile)
+    for port in et.iterfind('connections/con/ports/port'):
+        bufferDepth = port.find('bufferDepth')
+        if bufferDepth is not None and bufferDepth.get('value') == baseBufferDepth:
+            bufferDepth.set('value', str(bd))
+        vcCount = port.find('vcCount')
+        if vcCount is not None and vcCount.get('value') == baseVcCount:
+            vcCount.set('value', str(vc))
+    et.write(dstFile)
+
+
+def writeNtConfig(srcFile, dstFile, bench):
+    """ Write the netrace config of a benchmark """
+    et = ET.parse(srcFile)
+    netraceFile = et.find('application/netraceFile')
+    netraceFile.text = netraceFile.text.replace('BENCHMARK', '../../benchmarks/' + bench)
+    et.write(dstFile)
+
+
+def setupDirectory(origin, arch, bd, vc, bench):
+    runDir = dirName(arch, bd, vc, bench)
+    os.makedirs(os.path.join(runDir, 'config'), exist_ok=True)
+    writeNtConfig(os.path.join(origin, 'config', 'ntConfig.xml'),
+                  os.path.join(runDir, 'config', 'ntConfig.xml'), bench)
+    writeNetwork(os.path.join(origin, 'config', arch + '.xml'),
+                 os.path.join(runDir, 'config', 'network.xml'), bd, vc)
+    return runDir
 
-def gather_results(arch, bd, vc, bench):
-    dirName = arch + '_vc_' + str(vc) + '_bd_' + str(bd) + '_' + bench
-    latencies = get_latencies(dirName + '/report_Performance.csv')
-    flit_latency = latencies[0]
-    return flit_latency
 
 def get_latencies(latencies_results_file):
     """
@@ -81,36 +88,66 @@ def get_latencies(latencies_results_file):
     return (latencies)
 
 
+def runVariant(origin, arch, bd, vc, bench):
+    """
+    Simulate one variant in its own directory, unless it has been simulated
+    before.
+    Parameters:
+        - origin: the folder of the simulator and the base config files.
+        - arch, bd, vc, bench: the variant.
+    Return:
+        - The benchmark, the setting and the flit latency of the variant.
+    """
+    runDir = dirName(arch, bd, vc, bench)
+    reportFile = os.path.join(runDir, 'report_Performance.csv')
+    flitLatency = get_latencies(reportFile)[0]
+    if flitLatency < 0:
+        setupDirectory(origin, arch, bd, vc, bench)
+        with open(os.path.join(runDir, 'log'), 'w') as log:
+            subprocess.run([os.path.join(origin, 'sim')], cwd=runDir,
+                           stdout=log)
+        flitLatency = get_latencies(reportFile)[0]
+    else:
+        print('Skipping ' + runDir + ', it has been simulated already')
+    if arch == 'homoAsynch' and flitLatency >= 0:
+        flitLatency = flitLatency / 2
+    return bench, settingName(arch, bd, vc), flitLatency
 
-architectures = ['homoSynch', 'homoAsynch', 'pseudo', 'heteroSynch']
-bds = [4, 8]
-vcs = [4, 8]
-benchmarks = ['blackscholes_64c_simmedium', 'bodytrack_64c_simlarge', 'canneal_64c_simmedium',
-              'dedup_64c_simmedium', 'ferret_64c_simmedium', 'fluidanimate_64c_simmedium',
-              'fluidanimate_64c_simmedium', 'vips_64c_simmedium', 'x264_64c_simmedium']
-
-resultsIndex = benchmarks
-resultsColumns = []
-for arch in architectures:
-    for bd in bds:
-        for vc in vcs:
-            resultsColumns.append(arch + '_vc_' + str(vc) + '_bd_' + str(bd))
-results = pd.DataFrame(index=resultsIndex, columns=resultsColumns)
-results = results.fillna(0.0) # with 0s rather than NaNs
-print(results)
-
-for arch in architectures:
-    for bd in bds:
-        for vc in vcs:
-            for bench in benchmarks:
-                setupDirectory(arch, bd, vc, bench)
-                modifyFiles(arch, bd, vc, bench)
-                execute(arch, bd, vc, bench)
-                flitLatency = gather_results(arch, bd, vc, bench)
-                setting = arch + '_vc_' + str(vc) + '_bd_' + str(bd)
-                if arch == 'homoAsynch':
-                    flitLatency = flitLatency / 2
-                results.at[bench, setting] = flitLatency
-
-print(results)
-results.to_csv("parsec.csv")
+
+def writeResults(results, resultsFile):
+    """ Write the results matrix, replacing the previous file atomically """
+    results.to_csv(resultsFile + '.tmp')
+    os.replace(resultsFile + '.tmp', resultsFile)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PARSEC design space exploration')
+    parser.add_argument('--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help='the number of concurrent simulations')
+    parser.add_argument('--origin', default='../origin',
+                        help='the folder of the simulator and the base config files')
+    args = parser.parse_args()
+    origin = os.path.abspath(args.origin)
+
+    resultsColumns = []
+    for arch in architectures:
+        for bd in bds:
+            for vc in vcs:
+                resultsColumns.append(settingName(arch, bd, vc))
+    results = pd.DataFrame(0.0, index=benchmarks, columns=resultsColumns)
+
+    # Each run writes into its own directory, so all runs share one pool.
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(runVariant, origin, arch, bd, vc, bench)
+                   for arch in architectures for bd in bds for vc in vcs
+                   for bench in benchmarks]
+        for future in as_completed(futures):
+            bench, setting, flitLatency = future.result()
+            results.at[bench, setting] = flitLatency
+            writeResults(results, 'parsec.csv')
+
+    print(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script chooses the injection rates of an adaptive sweep
+###############################################################################
+import numpy as np
+###############################################################################
+
+
+class AdaptiveRateSweep:
+    """
+    Locate the saturation knee of the latency curve with few simulations.
+
+    The sweep starts with a coarse grid of injection rates. A rate is
+    saturated once its mean packet latency exceeds kneeFactor times the
+    latency of the lowest rate (the zero-load latency), or if none of its
+    runs delivered a result. The knee lies between the last unsaturated and
+    the first saturated rate; this bracket is refined by bisection until it
+    is not wider than the tolerance.
+    """
+
+    def __init__(self, rate_min, rate_max, step, tolerance, knee_factor,
+                 points=1):
+        """
+        Initialize the sweep.
+
+        Parameters:
+            - rate_min: the lowest injection rate.
+            - rate_max: the (excluded) highest injection rate.
+            - step: the step of the coarse grid.
+            - tolerance: the width of the bracket at which the sweep stops.
+            - knee_factor: the growth of the packet latency over the
+            zero-load latency which marks a rate as saturated.
+            - points: the number of rates added per refinement step, 1 is a
+            plain bisection, more rates keep more cores busy.
+        """
+        self.rate_min = rate_min
+        self.rate_max = rate_max
+        self.step = step
+        self.tolerance = tolerance
+        self.knee_factor = knee_factor
+        self.points = max(1, points)
+
+    def initial_rates(self):
+        """ Return the rates of the coarse grid """
+        if self.rate_min == self.rate_max:
+            return [self.rate_min]
+        grid = np.arange(self.rate_min, self.rate_max, self.step)
+        return [round(elem, 4) for elem in grid]
+
+    def is_saturated(self, latency, zero_load_latency):
+        """ Check if a mean packet latency lies beyond the knee """
+        return np.isnan(latency) or latency > self.knee_factor * zero_load_latency
+
+    def knee_bracket(self, mean_latencies):
+        """
+        Find the bracket of the knee.
+
+        Parameters:
+            - mean_latencies: a dictionary of the mean packet latency per
+            injection rate, nan for rates without any valid run.
+
+        Return:
+            - A tuple of the last unsaturated and the first saturated rate,
+            or None if all rates or none of them are saturated.
+        """
+        rates = sorted(mean_latencies)
+        zero_load_latency = mean_latencies[rates[0]]
+        if np.isnan(zero_load_latency):
+            return None
+        for low, high in zip(rates, rates[1:]):
+            if self.is_saturated(mean_latencies[high], zero_load_latency):
+                return low, high
+        return None
+
+    def next_rates(self, mean_latencies):
+        """
+        Choose the rates of the next refinement step.
+
+        Parameters:
+            - mean_latencies: a dictionary of the mean packet latency per
+            injection rate which has been simulated so far.
+
+        Return:
+            - A list of new injection rates, empty once the knee is located
+            within the tolerance.
+        """
+        bracket = self.knee_bracket(mean_latencies)
+        if bracket is None:
+            return []
+        low, high = bracket
+        # the rates are rounded to 4 decimals, so is their distance
+        if round(high - low, 4) <= self.tolerance:
+            return []
+        rates = np.linspace(low, high, self.points + 2)[1:-1]
+        rates = sorted(set(round(elem, 4) for elem in rates))
+        return [r for r in rates if low < r < high and r not in mean_latencies]
@@ -0,0 +1,103 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script renders the config.xml files of a sweep from one template
+###############################################################################
+import re
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+###############################################################################
+# The placeholder of a field in the serialized tree
+FIELD = '__field_%s__'
+FIELD_PATTERN = re.compile(FIELD % r'(\w+)')
+# The elements of config.xml whose value is the path of a routing table file
+ROUTING_TABLES = ['noc/routingTable/routingTable_path',
+                  'noc/routingTable/directionMatrix_path']
+###############################################################################
+
+
+def field(name):
+    """ Return the placeholder to be set as text or value of a field """
+    return FIELD % name
+###############################################################################
+
+
+def routing_table_nodes(tree):
+    """
+    Return the elements of the routing table files of a config tree, whose
+    value is the path as seen by the simulator. Empty unless the routing
+    table mode is on.
+    """
+    mode = tree.find('noc/routingTable/routingTable_mode')
+    if mode is None or mode.get('value', '').lower() not in ('true', '1'):
+        return []
+    return [node for node in map(tree.find, ROUTING_TABLES)
+            if node is not None]
+###############################################################################
+
+
+class ConfigTemplate:
+    """
+    A config.xml whose fields are filled in per run.
+
+    The tree is parsed and serialized once. Rendering a run only joins the
+    literal parts of the serialized tree with the escaped field values, so
+    it produces the same file as ElementTree.write of the filled-in tree.
+    A template is a list of strings, so it is cheap to send to worker
+    processes.
+    """
+
+    def __init__(self, tree):
+        """
+        Parameters:
+            - tree: the ElementTree of the config, whose varying texts and
+            attributes are set to field(name).
+        """
+        text = ET.tostring(tree.getroot(), encoding='unicode')
+        parts = FIELD_PATTERN.split(text)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+        # the files the runs need besides the topology
+        self.routing_tables = [node.get('value')
+                               for node in routing_table_nodes(tree)]
+
+    def render(self, **values):
+        """
+        Render the config of a run.
+
+        Parameters:
+            - values: the value of each field.
+
+        Return:
+            - The content of the config file.
+        """
+        parts = [self.literals[0]]
+        for name, literal in zip(self.fields, self.literals[1:]):
+            parts.append(escape(str(values[name]), {'"': '&quot;'}))
+            parts.append(literal)
+        return ''.join(parts)
+
+    def write(self, path, **values):
+        """ Render the config of a run into a file, see render """
+        with open(path, 'w', encoding='us-ascii',
+                  errors='xmlcharrefreplace') as f:
+            f.write(self.render(**values))
@@ -22,6 +22,7 @@
 ###############################################################################
 import configparser
 import xml_writers as writers
+import topologies
 import plot_network
 import os
 import multiprocessing
@@ -58,6 +59,41 @@ class Configuration:
         self.numCores = int(config['Synthetic']['numCores'])
         if (self.numCores == -1):
             self.numCores = multiprocessing.cpu_count()
+        # An empty cacheDir disables the result cache, cacheSize is in MB.
+        self.cacheDir = config['Synthetic'].get('cacheDir', '')
+        self.cacheSize = int(config['Synthetic'].get('cacheSize', '1024'))
+        # Run all simulations from one shared binary and topology, each run
+        # writes into a private directory below outputDir (e.g. /dev/shm).
+        self.sharedWorkspace = config['Synthetic'].getboolean('sharedWorkspace', False)
+        self.outputDir = config['Synthetic'].get('outputDir', '')
+        # Start with the coarse rate grid and bisect around the saturation
+        # knee until it is located within kneeTolerance.
+        self.adaptiveSweep = config['Synthetic'].getboolean('adaptiveSweep', False)
+        self.kneeTolerance = float(config['Synthetic'].get('kneeTolerance', '0.0025'))
+        self.kneeFactor = float(config['Synthetic'].get('kneeFactor', '3'))
+        # Run the restarts in waves of restartWave and stop once the
+        # confidence intervals of the latencies are narrower than
+        # restartTolerance times their mean. 0 runs all restarts.
+        self.restartTolerance = float(config['Synthetic'].get('restartTolerance', '0'))
+        self.restartWave = int(config['Synthetic'].get('restartWave', '4'))
+        self.restartConfidence = float(config['Synthetic'].get('restartConfidence', '0.95'))
+        # Kill runs whose undelivered packets per PE exceed saturationBacklog
+        # during the measurement phase, 0 lets all runs finish. The simulator
+        # reports its progress every progressInterval ns.
+        self.saturationBacklog = float(config['Synthetic'].get('saturationBacklog', '0'))
+        self.progressInterval = int(config['Synthetic'].get('progressInterval', '1000'))
+        # One command per line which starts a sim_worker.py, e.g. over ssh.
+        # Without workers all simulations run on this host.
+        self.workers = [w.strip() for w in config['Synthetic'].get('workers', '').splitlines() if w.strip()]
+        # The seeds of the runs are derived from seedBase, the injection rate
+        # and the restart. Sweeps with the same seedBase use the same seeds.
+        self.seedBase = config['Synthetic'].get('seedBase', '0')
+        # The power profile of bin/power, the power of each run is estimated
+        # and stored with its latencies. Empty disables the power stage.
+        self.powerProfile = config['Synthetic'].get('powerProfile', '')
+        # The name of the sweep in the results store. Empty names it after
+        # the sweep folder and the start time, so no sweep overwrites another.
+        self.experiment = config['Synthetic'].get('experiment', '')
 
         self.bufferReportRouters = config['Report']['bufferReportRouters']
         try:
@@ -78,6 +114,16 @@ class Configuration:
                 raise
         self.z = int(config['Hardware']['z'])
         self.routing = config['Hardware']['routing']
+        self.topology = config['Hardware'].get('topology', 'mesh')
+        # Only the mesh can be routed by the position based routings, the
+        # other topologies are routed by the tables of topologies.py.
+        if self.topology != 'mesh' and self.routing != 'Table':
+            raise ValueError('the topology ' + self.topology +
+                             ' needs routing = Table, not ' + self.routing)
+        self.tsvPlacement = config['Hardware'].get('tsvPlacement', 'full')
+        self.tsvCount = int(config['Hardware'].get('tsvCount', 1))
+        self.tsvStride = int(config['Hardware'].get('tsvStride', 2))
+        self.tsvSeed = int(config['Hardware'].get('tsvSeed', 0))
         self.clockDelay = config['Hardware']['clockDelay']
         try:
                 self.clockDelay = self.clockDelay[1:len(self.clockDelay)-1]
@@ -111,7 +157,15 @@ def main():
     writer = writers.ConfigWriter(config)
     writer.write_config('config.xml')
 
-    writer = writers.NetworkWriter(config)
+    # config.xml refers to the tables as config/RT.txt and
+    # config/Direction_Mat.txt, the runners copy them there.
+    if config.routing == 'Table':
+        topology = topologies.from_config(config)
+        topology.write_routing('RT.txt', 'Direction_Mat.txt')
+    if config.topology == 'mesh':
+        writer = writers.NetworkWriter(config)
+    else:
+        writer = writers.TopologyWriter(config, topology)
     writer.write_network('network.xml')
     #plot_network.main()
 ###############################################################################
@@ -0,0 +1,164 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script renders the router values of the simulator telemetry as one
+# 2D heatmap per layer, on screen with blitting or into a video file
+###############################################################################
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib import animation
+###############################################################################
+
+
+class HeatmapRenderer:
+    """
+    One heatmap image per layer, whose pixels are the routers.
+
+    The images, the colorbar and the time stamp are created once, a frame
+    only replaces the data of the images. On screen, the frames are blitted
+    onto the saved background of the figure. Offscreen, they are passed to
+    a matplotlib movie writer, which needs no display.
+    """
+
+    def __init__(self, positions, layers, vmax=None, cmap='inferno'):
+        """
+        Parameters:
+            - positions: an (n, 2) or (n, 3) array of the x and y position
+            of each router, in the order of the telemetry frames.
+            - layers: the layer of each router.
+            - vmax: the value of the brightest color. By default it follows
+            the largest value drawn so far.
+            - cmap: the colormap of the heatmaps.
+        """
+        positions = np.asarray(positions, dtype=float)
+        self.layers = np.asarray(layers, dtype=int)
+        # the grid index of each router, from its distinct positions
+        xs, self.xi = np.unique(positions[:, 0], return_inverse=True)
+        ys, self.yi = np.unique(positions[:, 1], return_inverse=True)
+        numLayers = self.layers.max() + 1
+        self.grid = np.full((numLayers, len(ys), len(xs)), np.nan)
+        self.vmax = vmax
+        self.fixedScale = vmax is not None
+
+        self.fig, axes = plt.subplots(1, numLayers, squeeze=False,
+                                      figsize=(3 * numLayers + 1, 3.5))
+        self.images = []
+        for layer, ax in enumerate(axes[0]):
+            image = ax.imshow(self.grid[layer], cmap=cmap, origin='lower',
+                              vmin=0, vmax=vmax or 1, animated=True)
+            ax.set_title('Layer ' + str(layer))
+            ax.set_xticks([])
+            ax.set_yticks([])
+            self.images.append(image)
+        self.fig.colorbar(self.images[0], ax=axes[0].tolist(),
+                          label='average buffer usage')
+        self.timeStamp = self.fig.text(0.01, 0.01, '', animated=True)
+        self.background = None
+        self.writer = None
+
+    def update(self, time, values):
+        """
+        Set the values of a frame.
+
+        Parameters:
+            - time: the simulated time in ps.
+            - values: the value of each router.
+
+        Return:
+            - True if the color scale has changed, so the whole figure must
+            be redrawn.
+        """
+        self.grid[self.layers, self.yi, self.xi] = values
+        for layer, image in enumerate(self.images):
+            image.set_data(self.grid[layer])
+        self.timeStamp.set_text('Time: ' + str(time / 1000) + ' ns')
+        if self.fixedScale:
+            return False
+        largest = np.nanmax(self.grid)
+        if self.vmax is not None and largest <= self.vmax:
+            return False
+        # grow the scale in steps, so it rarely changes
+        self.vmax = max(largest * 1.5, 1e-3)
+        for image in self.images:
+            image.set_clim(0, self.vmax)
+        return True
+
+    def show(self):
+        """ Open the window of the figure """
+        plt.show(block=False)
+        self.redraw()
+
+    def redraw(self):
+        """ Draw the whole figure and save its background for blitting """
+        canvas = self.fig.canvas
+        canvas.draw()
+        self.background = canvas.copy_from_bbox(self.fig.bbox)
+        self.blit()
+
+    def blit(self):
+        """ Draw the images and the time stamp onto the background """
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        for artist in self.images + [self.timeStamp]:
+            self.fig.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def draw(self, time, values):
+        """ Update the window with a frame, see update """
+        if self.update(time, values) or self.background is None:
+            self.redraw()
+        else:
+            self.blit()
+
+    def record(self, path, fps=30, dpi=100):
+        """
+        Write the following frames into a video instead of a window.
+
+        Parameters:
+            - path: the video file, .gif is written by Pillow and other
+            formats, e.g. .mp4, by ffmpeg.
+            - fps: the frame rate of the video.
+            - dpi: the resolution of the video.
+
+        Return:
+            - None.
+        """
+        for artist in self.images + [self.timeStamp]:
+            artist.set_animated(False)
+        if path.endswith('.gif'):
+            self.writer = animation.PillowWriter(fps=fps)
+        else:
+            self.writer = animation.FFMpegWriter(fps=fps)
+        self.writer.setup(self.fig, path, dpi)
+
+    def write(self, time, values):
+        """ Append a frame to the video, see record and update """
+        self.update(time, values)
+        self.writer.grab_frame()
+
+    def close(self):
+        """ Finish the video, if one is recorded """
+        if self.writer is not None:
+            self.writer.finish()
+            self.writer = None
+        plt.close(self.fig)
@@ -22,7 +22,7 @@
 
 # This script generates simple topology files for 2D or 3D meshes
 ###############################################################################
-import sys
+import argparse
 import numpy as np
 from mpl_toolkits.mplot3d import Axes3D
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
@@ -30,7 +30,7 @@ import matplotlib.pyplot as plt
 import xml.etree.ElementTree as ET
 import configparser
 import zmq
-import json
+from heatmap_renderer import HeatmapRenderer
 ###############################################################################
 # Global variables
 fig = None  # Figure Object
@@ -44,6 +44,14 @@ num_of_layers = 0  # The number of layers in the mesh
 # That means each face consists of only four points.
 layers = []  # list of the layers
 faces = []  # List of the faces, for drawing reasons
+# The header of the telemetry frames of the simulator, see TelemetryHeader in
+# NoC.h. It is followed by the average buffer usage of each router as float.
+TELEMETRY_HEADER = np.dtype([('magic', '<u4'), ('routers', '<u4'),
+                             ('time', '<f8')])
+TELEMETRY_MAGIC = 0x4D4C4554
+# The weight of a new frame in the moving average of the router load. The
+# frames are telemetryInterval ns apart, see config.xml.
+alpha = .1
 ###############################################################################
 
 
@@ -279,54 +287,147 @@ def colorize_nodes(colorValues):
 ###############################################################################
 
 
-def main():
+def decode_frame(message):
     """
-    Main Execution Point
+    Decode a telemetry frame of the simulator.
+
+    Parameters:
+        - message: the bytes of the frame.
+
+    Return:
+        - The simulated time in ps and the array of the average buffer usage
+        of each router. The array is a view of message.
     """
-    network_file = '../simulator/config/network.xml'
-    try:
-        network_file = sys.argv[1]
-    except IndexError:
-        pass
-    init_script(network_file)
+    header = np.frombuffer(message, dtype=TELEMETRY_HEADER, count=1)[0]
+    if header['magic'] != TELEMETRY_MAGIC:
+        raise ValueError('not a telemetry frame')
+    usage = np.frombuffer(message, dtype='<f4', count=header['routers'],
+                          offset=TELEMETRY_HEADER.itemsize)
+    return float(header['time']), usage
+###############################################################################
+
 
+def subscribe(address, conflate=True):
+    """
+    Subscribe to the telemetry of the simulator. With conflate, only the
+    latest frame is kept, so frames which arrive while a frame is drawn are
+    dropped.
+    """
+    context = zmq.Context()
+    socket = context.socket(zmq.SUB)
+    if conflate:
+        socket.setsockopt(zmq.CONFLATE, 1)
+    socket.setsockopt(zmq.SUBSCRIBE, b'')
+    socket.connect(address)
+    return socket
+###############################################################################
+
+
+def show_scatter(address):
+    """
+    Show the router load on the 3D plot of the network
+    """
     create_fig()
     plot_connections()
 #    annotate_points()
 #    create_faces()
 #    plot_faces()
     colorize_nodes(range(len(points)))
-    timeStamp = ax.text(2, 2, 2, 0, size=12, color='red')
+    timeStamp = ax.text(0, 1, 1, '', size=12, color='red')
 
-    averageRouterLoad = [0] * len(points)
-
-    context = zmq.Context()
+    averageRouterLoad = np.zeros(len(points))
 
     #  Socket to talk to server
     print("Connecting to simulator server")
-    socket = context.socket(zmq.REQ)
-    socket.connect("tcp://localhost:5555")
-   
-    for request in range(2000000):
-        socket.send_string("Hello")
-        message = socket.recv()
-        data = json.loads(message)
-        time = float(data["Time"]["time"])
-        currentLoad = []
-        for routerindex in range(len(points)):
-            currentRouterValue = float(data["Data"][routerindex]['averagebufferusage'])
-            currentLoad.append(currentRouterValue)
-            alpha = .01
-            averageRouterLoad[routerindex] = alpha * currentRouterValue + (1 - alpha) * averageRouterLoad[routerindex] 
-        
-        routerHeat.remove()  
-        colorize_nodes(averageRouterLoad)
-        timeStamp.remove()
-        timeStampvalue = "Time: " + str(time/1000) + " ns"
-        timeStamp = ax.text(0, 1, 1, timeStampvalue, size=12, color='red')
-        plt.pause(1/30)        
+    socket = subscribe(address)
+
+    while plt.fignum_exists(fig.number):
+        # the window stays responsive while no frame arrives
+        if socket.poll(0):
+            time, currentLoad = decode_frame(socket.recv())
+            averageRouterLoad = alpha * currentLoad + (1 - alpha) * averageRouterLoad
+            routerHeat.set_array(averageRouterLoad)
+            routerHeat.autoscale()
+            timeStamp.set_text("Time: " + str(time/1000) + " ns")
+        plt.pause(1/30)
         
     plt.show()
+###############################################################################
+
+
+def show_heatmaps(args):
+    """
+    Show the router load as 2D heatmaps of the layers, or write them into
+    a video without a display if args.output is set
+    """
+    if args.output:
+        plt.switch_backend('Agg')
+    renderer = HeatmapRenderer([p[0] for p in points], [p[1] for p in points],
+                               args.vmax)
+    averageRouterLoad = np.zeros(len(points))
+
+    print("Connecting to simulator server")
+    # a video keeps the frames which arrive while one is encoded
+    socket = subscribe(args.address, conflate=not args.output)
+    if args.output:
+        renderer.record(args.output, args.fps)
+    else:
+        renderer.show()
+
+    frames = 0
+    try:
+        while args.frames is None or frames < args.frames:
+            if args.output:
+                # the simulation has ended
+                if not socket.poll(args.timeout * 1000):
+                    break
+            elif not plt.fignum_exists(renderer.fig.number):
+                break
+            elif not socket.poll(1000 / args.fps):
+                renderer.fig.canvas.flush_events()
+                continue
+            time, currentLoad = decode_frame(socket.recv())
+            averageRouterLoad = alpha * currentLoad + (1 - alpha) * averageRouterLoad
+            if args.output:
+                renderer.write(time, averageRouterLoad)
+            else:
+                renderer.draw(time, averageRouterLoad)
+            frames += 1
+    finally:
+        renderer.close()
+###############################################################################
+
+
+def main():
+    """
+    Main Execution Point
+    """
+    parser = argparse.ArgumentParser(
+            description='Show the buffer usage of the routers of a running simulation')
+    parser.add_argument('network_file', nargs='?',
+                        default='../simulator/config/network.xml',
+                        help='the network.xml of the simulation')
+    parser.add_argument('address', nargs='?', default='tcp://localhost:5555',
+                        help='the telemetry endpoint of the simulator')
+    parser.add_argument('--heatmap', action='store_true',
+                        help='show a 2D heatmap per layer instead of the 3D network')
+    parser.add_argument('--output',
+                        help='write the heatmaps into this video, e.g. .mp4 or .gif, without a display')
+    parser.add_argument('--fps', type=int, default=30,
+                        help='the frame rate of the heatmaps')
+    parser.add_argument('--frames', type=int,
+                        help='stop after this number of frames')
+    parser.add_argument('--timeout', type=float, default=10,
+                        help='stop a video after this many seconds without a frame')
+    parser.add_argument('--vmax', type=float,
+                        help='the load of the brightest color, follows the load by default')
+    args = parser.parse_args()
+    init_script(args.network_file)
+
+    if args.heatmap or args.output:
+        show_heatmaps(args)
+    else:
+        show_scatter(args.address)
         
 ###############################################################################
 
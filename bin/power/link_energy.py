@@ -0,0 +1,307 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+import os
+import hashlib
+import xml.etree.ElementTree as ET
+import numpy as np
+###############################################################################
+# The states of the link matrices of report_Links.csv: IDLE, HEAD,
+# HEAD-IDLE and a data and a data-idle state per traffic type, see
+# GlobalReport::reportLinkMatrix.
+IDLE_STATE = 0
+HEAD_STATE = 1
+HEAD_IDLE_STATE = 2
+FIRST_DATA_STATE = 3
+# The kinds of links: between a processing element and its router, between
+# two routers of a layer and between two layers.
+LINK_KINDS = ['local', '2D', '3D']
+###############################################################################
+
+
+def link_states(num_columns):
+    """ Get the number of states of a report_Links.csv with num_columns """
+    num_states = int(round(np.sqrt(num_columns)))
+    if num_states * num_states != num_columns:
+        raise ValueError('the link matrices are not square')
+    return num_states
+###############################################################################
+
+
+def num_link_states(num_traffic_types):
+    """ Get the number of link states of a simulation with traffic types """
+    return 2 * num_traffic_types + FIRST_DATA_STATE
+###############################################################################
+
+
+def flit_states(num_states):
+    """ Get the link states in which a flit is transmitted """
+    return [HEAD_STATE] + list(range(FIRST_DATA_STATE, num_states, 2))
+###############################################################################
+
+
+def parse_link_counts(links_path, num_traffic_types=None, dtype=np.int64):
+    """ Parse a report_Links.csv, see read_link_counts """
+    with open(links_path, 'r') as f:
+        num_columns = len(f.readline().split(',')) - 1
+        num_states = link_states(num_columns)
+        if num_traffic_types is not None and \
+                num_states != num_link_states(num_traffic_types):
+            raise ValueError('%s has %d link states, %d traffic types have %d'
+                             % (links_path, num_states, num_traffic_types,
+                                num_link_states(num_traffic_types)))
+        # the C parser of loadtxt, the rows are the link id and the counts
+        data = np.loadtxt(f, delimiter=',', dtype=dtype, ndmin=2)
+    data = data.reshape(-1, num_columns + 1)
+    ids = data[:, 0]
+    if not (ids == np.arange(len(ids))).all():
+        data = data[np.argsort(ids, kind='stable')]
+    return np.ascontiguousarray(data[:, 1:]).reshape(-1, num_states,
+                                                     num_states)
+###############################################################################
+
+
+def read_link_counts(links_path, num_traffic_types=None, dtype=np.int64,
+                     cache_dir=None):
+    """
+    Read the transition counts of the links of a report_Links.csv.
+
+    Parameters:
+        - links_path: the path of the report_Links.csv.
+        - num_traffic_types: the numberOfTrafficTypes of the simulation, the
+        matrices have 2 * num_traffic_types + 3 states. By default the
+        number of states is taken from the header.
+        - dtype: the type of the counts.
+        - cache_dir: if given, the parsed counts are kept there as .npy
+        files and read back as memory maps as long as the csv file does not
+        change.
+
+    Return:
+        - A (links, states, states) array, the count of the cycles in which
+        a link went from one state to another.
+    """
+    if cache_dir is None:
+        return parse_link_counts(links_path, num_traffic_types, dtype)
+    stat = os.stat(links_path)
+    key = hashlib.sha256(('%s:%d:%d:%s' % (
+            os.path.abspath(links_path), stat.st_size, stat.st_mtime_ns,
+            np.dtype(dtype).str)).encode()).hexdigest()[:16]
+    cached = os.path.join(cache_dir, key + '_links.npy')
+    if not os.path.exists(cached):
+        counts = parse_link_counts(links_path, num_traffic_types, dtype)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cached + '.tmp' + str(os.getpid()) + '.npy'
+        np.save(tmp, counts)
+        os.replace(tmp, cached)
+    counts = np.load(cached, mmap_mode='r')
+    if num_traffic_types is not None and \
+            counts.shape[1] != num_link_states(num_traffic_types):
+        raise ValueError('%s does not have %d traffic types'
+                         % (links_path, num_traffic_types))
+    return counts
+###############################################################################
+
+
+def stack_link_counts(links_paths, num_traffic_types=None, dtype=np.int64,
+                      cache_dir=None):
+    """
+    Read the link counts of several runs of a network, e.g. of a sweep.
+
+    Return:
+        - A (runs, links, states, states) array, see read_link_counts.
+    """
+    return np.stack([read_link_counts(p, num_traffic_types, dtype, cache_dir)
+                     for p in links_paths])
+###############################################################################
+
+
+def read_link_classes(network_path):
+    """
+    Group the links of a network.xml by their physical class.
+
+    The simulator creates two links per connection, in the order of the
+    connections: the first one sends from the first to the second node of
+    the connection, the second one back. The class of a link is its kind
+    (see LINK_KINDS), the layer of its sending node and its length in the
+    xy plane, in the units of the node positions.
+
+    Parameters:
+        - network_path: the path of the network.xml.
+
+    Return:
+        - A list of the (kind, layer, length) classes and an array of the
+        class index of each link, indexed by the link id.
+    """
+    root = ET.parse(network_path).getroot()
+    router_types = {int(t.get('id'))
+                    for t in root.find('nodeTypes').iter('nodeType')
+                    if t.find('model').get('value') == 'RouterVC'}
+    nodes = {}
+    for node in root.find('nodes').iter('node'):
+        nodes[int(node.get('id'))] = (
+            float(node.find('xPos').get('value')),
+            float(node.find('yPos').get('value')),
+            int(node.find('layer').get('value')),
+            int(node.find('nodeType').get('value')) in router_types)
+    classes = {}
+    link_class = []
+    for con in root.find('connections').iter('con'):
+        a, b = [int(port.find('node').get('value'))
+                for port in con.find('ports').iter('port')]
+        for src, dst in ((a, b), (b, a)):
+            xs, ys, layer, src_router = nodes[src]
+            xd, yd, dst_layer, dst_router = nodes[dst]
+            if not (src_router and dst_router):
+                kind = 'local'
+            elif layer != dst_layer:
+                kind = '3D'
+            else:
+                kind = '2D'
+            key = (kind, layer, round(float(np.hypot(xd - xs, yd - ys)), 6))
+            link_class.append(classes.setdefault(key, len(classes)))
+    return list(classes), np.array(link_class, dtype=int)
+###############################################################################
+
+
+class FlitCoefficients:
+    """
+    The coefficients of a model in which each transmitted flit costs the
+    same energy on every link, see LinkEnergyModel.
+    """
+
+    def __init__(self, flit_energy):
+        """
+        Parameters:
+            - flit_energy: the energy of a flit.
+        """
+        self.flit_energy = flit_energy
+
+    def __call__(self, link_class, num_states):
+        coeff = np.zeros((num_states, num_states))
+        coeff[:, flit_states(num_states)] = self.flit_energy
+        return coeff
+###############################################################################
+
+
+class InterconnectCoefficients:
+    """
+    The coefficients of the physical interconnect model of link_power.py,
+    see LinkEnergyModel.
+
+    The model gets a data stream and a hold state per stream. The head
+    flits are the first stream, with IDLE and HEAD-IDLE as its hold, and
+    the data flits of each traffic type are a further stream. The model is
+    evaluated once for each transition of the model states, with all of
+    the probability on it. As the mean energy is linear in the transition
+    probabilities, these energies are the coefficients of the transitions.
+    """
+
+    def __init__(self, make_interconnect, streams):
+        """
+        Parameters:
+            - make_interconnect: a function which returns the Interconnect
+            of a (kind, layer, length) class, e.g. interconnect_2D_dig with
+            metal_wire_length of the length.
+            - streams: the DataStream of the head flits and of each traffic
+            type.
+        """
+        self.make_interconnect = make_interconnect
+        self.streams = streams
+
+    def model_states(self, num_states):
+        """ Get the model state of each link state """
+        num_streams = len(self.streams)
+        model_state = np.empty(num_states, dtype=int)
+        model_state[[IDLE_STATE, HEAD_IDLE_STATE]] = num_streams
+        model_state[HEAD_STATE] = 0
+        for state in range(FIRST_DATA_STATE, num_states):
+            stream = (state - FIRST_DATA_STATE) // 2 + 1
+            data = (state - FIRST_DATA_STATE) % 2 == 0
+            model_state[state] = stream if data else num_streams + stream
+        return model_state
+
+    def __call__(self, link_class, num_states):
+        # a stream per traffic type besides the head flits, see model_states
+        if num_states != 2 * len(self.streams) + 1:
+            raise ValueError(
+                    '%d link states need %d streams (the head flits and one '
+                    'per traffic type), got %d' % (
+                        num_states, (num_states - 1) // 2, len(self.streams)))
+        interconnect = self.make_interconnect(*link_class)
+        num_model_states = 2 * len(self.streams)
+        model = np.zeros((num_model_states, num_model_states))
+        for i in range(num_model_states):
+            for j in range(num_model_states):
+                mux = np.zeros((num_model_states, num_model_states))
+                mux[i, j] = 1
+                model[i, j] = interconnect.E(self.streams, mux.tolist())
+        model_state = self.model_states(num_states)
+        return model[np.ix_(model_state, model_state)]
+###############################################################################
+
+
+class LinkEnergyModel:
+    """
+    The energy of the links of a NoC from their transition counts.
+
+    The energy of a link is the sum over its state transitions of the count
+    of the transition times its energy. The energies of the transitions
+    depend only on the class of the link, so they are computed once per
+    class and kept. The energy of all links is then one tensor contraction.
+    """
+
+    def __init__(self, coefficients):
+        """
+        Parameters:
+            - coefficients: a function of a (kind, layer, length) class and
+            the number of link states, which returns the (states, states)
+            energy of each transition, e.g. FlitCoefficients or
+            InterconnectCoefficients.
+        """
+        self.coefficients = coefficients
+        self.cache = {}
+
+    def class_coefficients(self, link_class, num_states):
+        """ Get the memoized transition energies of a class """
+        key = (link_class, num_states)
+        if key not in self.cache:
+            self.cache[key] = np.asarray(
+                    self.coefficients(link_class, num_states), dtype=float)
+        return self.cache[key]
+
+    def energy(self, counts, classes, link_class):
+        """
+        Compute the energy of each link.
+
+        Parameters:
+            - counts: the (links, states, states) transition counts, or a
+            (runs, links, states, states) stack of several runs.
+            - classes, link_class: the classes and the class of each link,
+            see read_link_classes.
+
+        Return:
+            - The (links,) or (runs, links) energy.
+        """
+        num_states = counts.shape[-1]
+        coeff = np.stack([self.class_coefficients(c, num_states)
+                          for c in classes])
+        return np.einsum('...lij,lij->...l', counts, coeff[link_class])
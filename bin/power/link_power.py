@@ -8,8 +8,10 @@ and if desired I can give you an indetail explanation,
 but it is a lot of boring physical stuff.
 '''
 # # # # # # # 0 IMPORT MODULE CLASSES  # # # # # # # # # # # # #
+import xml.etree.ElementTree as ET
 from interconnect import Interconnect, Driver, DataStream, DataStreamProb
-import pandas as pd
+from link_energy import read_link_classes, read_link_counts, \
+    InterconnectCoefficients, LinkEnergyModel
 
 # # # # # # # # # # 1 PARAMETERS YOU  CAN SET # # # # # # # # # # #
 # -----------------TECH DEPENDENT PARAMETERS-----------------------------------
@@ -163,17 +165,51 @@ print("DS2: Interconnect DS-2D consumes on average %.2f [fJ] per clock cycle"
 print("----------------------------------------------------------------------\n\n")
 
 
-# =============================================================================
-# mux = [[0.25832583, 0.14271427, 0.09540954, 0],  # DS1 --> DS1, DS3, H1, H3
-#        [0.16891689, 0.14241424, 0, 0.03830383],  # DS3 --> DS1, DS3, H1, H3
-#        [0.06450645, 0.03080308,  0.01050105, 0],  # H1 --> DS1, DS3, H1, H3
-#        [0.00460046, 0.03370337, 0, 0.00980098]]  # H3 --> DS1, DS3, H1, H3
-# =============================================================================
-
-mux = pd.read_csv('../../simulator/report_Links.csv').values.tolist()
+mux = [[0.25832583, 0.14271427, 0.09540954, 0],  # DS1 --> DS1, DS3, H1, H3
+       [0.16891689, 0.14241424, 0, 0.03830383],  # DS3 --> DS1, DS3, H1, H3
+       [0.06450645, 0.03080308,  0.01050105, 0],  # H1 --> DS1, DS3, H1, H3
+       [0.00460046, 0.03370337, 0, 0.00980098]]  # H3 --> DS1, DS3, H1, H3
 
 E_mean_mux_ds1_ds3 = interconnect_2D_ds_real.E([ds1, ds3], mux)
 print("-----------------ENERGY - MUX/HOLD - SPECIFIC DATA--------------------")
 print("DS1+DS3: Interconnect DS-2D consumes on average %.2f [fJ] per clock cycle"
       % (E_mean_mux_ds1_ds3*1e15))
 print("----------------------------------------------------------------------\n\n")
+
+
+
+# # # # 5 ENERGY OF ALL LINKS OF A SIMULATED NOC
+
+# The links of the NoC are grouped into classes of kind, layer and length
+# (see link_energy.read_link_classes). The model is evaluated once per class
+# and state transition, all links are then weighted with their transition
+# counts from report_Links.csv at once.
+layer_size = 4e3  # edge length of a layer in um, the node positions are relative to it
+local_length = 50  # wire length between a processing element and its router in um
+ms_layers = []  # the layers in the mixed-signal technology
+
+
+def make_interconnect(kind, layer, length):
+    if kind == '3D':
+        interconnect = interconnect_3D_ms if layer in ms_layers else interconnect_3D_dig
+    else:
+        interconnect = interconnect_2D_ms if layer in ms_layers else interconnect_2D_dig
+    if kind == 'local':
+        return interconnect.metal_wire_length(local_length)
+    return interconnect.metal_wire_length(max(length * layer_size, local_length))
+
+
+# the head flits and the data of each traffic type of the simulation, the
+# number of traffic types must be the one of the simulated config.xml
+num_traffic_types = int(ET.parse('../../simulator/config/config.xml').find(
+    'application/numberOfTrafficTypes').get('value'))
+streams = [ds2] + [ds1] * num_traffic_types
+link_classes, link_class = read_link_classes('../../simulator/config/network.xml')
+link_counts = read_link_counts('../../simulator/report_Links.csv',
+                               num_traffic_types)
+links = LinkEnergyModel(InterconnectCoefficients(make_interconnect, streams))
+E_links = links.energy(link_counts, link_classes, link_class)
+print("-----------------ENERGY - ALL LINKS OF THE NOC------------------------")
+print("The %d links of %d classes consume %.2f [pJ] in total"
+      % (len(E_links), len(link_classes), E_links.sum()*1e12))
+print("----------------------------------------------------------------------\n\n")
@@ -21,8 +21,15 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 ###############################################################################
 import configparser
+import xml.etree.ElementTree as ET
+import numpy as np
 import pandas as pd
 ###############################################################################
+# The router events of report_Routers_Power.csv, in the order of the energies
+# of the Dynamic section of power_profile.ini
+EVENTS = ['buffer_push', 'buffer_pop', 'buffer_read_front', 'routing',
+          'crossbar']
+###############################################################################
 
 
 def make_list(string):
@@ -39,26 +46,126 @@ def get_layer(router_id, num_of_routers, num_of_layers):
 ###############################################################################
 
 
+def read_router_layers(network_path):
+    """
+    Read the layer of each router from a network.xml.
+
+    Parameters:
+        - network_path: the path of the network.xml.
+
+    Return:
+        - An array of the layer of each router, indexed by the router id.
+    """
+    root = ET.parse(network_path).getroot()
+    router_types = {int(t.get('id'))
+                    for t in root.find('nodeTypes').iter('nodeType')
+                    if t.find('model').get('value') == 'RouterVC'}
+    layers = {}
+    for node in root.find('nodes').iter('node'):
+        if int(node.find('nodeType').get('value')) in router_types:
+            layers[int(node.get('id'))] = int(node.find('layer').get('value'))
+    router_layers = np.zeros(max(layers) + 1, dtype=int)
+    router_layers[list(layers.keys())] = list(layers.values())
+    return router_layers
+###############################################################################
+
+
+def read_clock_counts(clocks_path):
+    """ Read the clock counts of each layer from a report.txt """
+    with open(clocks_path, 'r') as f:
+        for line in f:
+            if 'Clock Counts' in line:
+                return make_list(line.split(':')[1])
+    raise ValueError('no clock counts in ' + clocks_path)
+###############################################################################
+
+
+def static_power(clocks, ni_s, router_s):
+    """
+    Compute the static power of all routers.
+
+    Parameters:
+        - clocks: the clock count of each layer.
+        - ni_s, router_s: the static power of a network interface and of a
+        router of each layer.
+
+    Return:
+        - The static power.
+    """
+    num_of_layers = len(clocks)
+    return float(np.dot(clocks, np.add(ni_s[:num_of_layers],
+                                       router_s[:num_of_layers])))
+###############################################################################
+
+
+def read_event_counts(power_path):
+    """
+    Read the router events of a report_Routers_Power.csv.
+
+    Return:
+        - A (routers, events) array of the event counts of each router,
+        indexed by the router id, see EVENTS.
+    """
+    df = pd.read_csv(power_path, index_col='router_id')
+    return df[EVENTS].sort_index().to_numpy(dtype=float)
+###############################################################################
+
+
+def dynamic_power(counts, energies, router_layers):
+    """
+    Compute the dynamic power of each router.
+
+    Parameters:
+        - counts: the (routers, events) event counts, or a
+        (runs, routers, events) stack of the counts of several runs.
+        - energies: the (layers, events) energy of each event on each layer.
+        - router_layers: the layer of each router.
+
+    Return:
+        - The (routers,) or (runs, routers) dynamic power.
+    """
+    return np.einsum('...re,re->...r', counts,
+                     np.asarray(energies)[router_layers])
+###############################################################################
+
+
+def batch_dynamic_power(power_paths, energies, router_layers):
+    """
+    Compute the dynamic power of the routers of several runs of a network.
+
+    Parameters:
+        - power_paths: the report_Routers_Power.csv of each run.
+        - energies, router_layers: see dynamic_power.
+
+    Return:
+        - The (runs, routers) dynamic power.
+    """
+    counts = np.stack([read_event_counts(p) for p in power_paths])
+    return dynamic_power(counts, energies, router_layers)
+###############################################################################
+
+
 class PowerCalculator:
     """The Power Calculator Class."""
 
-    def __init__(self, config_path, clocks_path, power_path):
-        """Intitialize the PowerCalculator by providing the necessary files."""
+    def __init__(self, config_path, clocks_path, power_path,
+                 network_path=None):
+        """
+        Intitialize the PowerCalculator by providing the necessary files.
+
+        The layer of each router is read from network_path. Without it, the
+        routers are assumed to be split evenly among the layers by id.
+        """
         self.config_path = config_path
         self.clocks_path = clocks_path
         self.power_path = power_path
         config = configparser.ConfigParser()
         try:
             config.read(self.config_path)
-            f = open(self.clocks_path, 'r')
             self.df_power = pd.read_csv(self.power_path)
         except Exception:
             raise
-        for line in f:
-            if 'Clock Counts' in line:
-                l1 = line.split(':')[1]
-                self.clocks = make_list(l1)
-                break
+        self.clocks = read_clock_counts(self.clocks_path)
         self.num_of_layers = len(self.clocks)
         self.num_of_routers = len(self.df_power)
 
@@ -67,30 +174,28 @@ class PowerCalculator:
         self.layers_d = []
         for i in range(0, self.num_of_layers):
             self.layers_d.append(make_list(config['Dynamic']['layer'+str(i)]))
+        # (layers, events) energy matrix
+        self.energies = np.array(self.layers_d)
+
+        if network_path is not None:
+            self.router_layers = read_router_layers(network_path)
+        else:
+            self.router_layers = get_layer(
+                    np.arange(self.num_of_routers), self.num_of_routers,
+                    self.num_of_layers).astype(int)
 
     def get_static_power(self):
         """Get the static power of all routers."""
-        total_sum = 0.0
-        for i in range(0, self.num_of_layers):
-            total_sum += self.clocks[i] * (self.ni_s[i] + self.router_s[i])
-        return total_sum
+        return static_power(self.clocks, self.ni_s, self.router_s)
 
     def get_dynamic_power(self):
         """Get the dynamic power of all routers."""
-        self.df_power['dynamic_power'] = self.df_power.apply(
-                                                self.get_router_power, axis=1)
+        ids = self.df_power['router_id'].to_numpy()
+        self.df_power['dynamic_power'] = dynamic_power(
+                self.df_power[EVENTS].to_numpy(dtype=float), self.energies,
+                self.router_layers[ids])
         self.df_power.to_csv('power_per_router.csv', index=False)
         return self.df_power['dynamic_power'].sum()
-
-    def get_router_power(self, row):
-        """Get the dynamic power of one row(router)."""
-        router_power = 0.0
-        layer = int(get_layer(row['router_id'], self.num_of_routers,
-                    self.num_of_layers))
-        for index, value in enumerate(row):
-            if index != 0:  # we don't consider 0, because it's router_id
-                router_power = value * self.layers_d[layer][index-1]
-        return router_power
 ###############################################################################
 
 
@@ -99,7 +204,8 @@ def main():
     config_path = 'power_profile.ini'
     clocks_path = '../../simulator/report.txt'
     power_path = '../../simulator/report_Routers_Power.csv'
-    calc = PowerCalculator(config_path, clocks_path, power_path)
+    network_path = '../../simulator/config/network.xml'
+    calc = PowerCalculator(config_path, clocks_path, power_path, network_path)
     print('Static Power:', calc.get_static_power(), 'pJ')
     print('Dynamic Power:', calc.get_dynamic_power(), 'pJ')
 ###############################################################################
@@ -0,0 +1,104 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+# This script estimates the router power and the link energy of each run of
+# a sweep from its reports, see bin/power
+###############################################################################
+import os
+import configparser
+import numpy as np
+from power.router_power import make_list, read_router_layers, \
+    read_clock_counts, read_event_counts, static_power, dynamic_power
+from power.link_energy import read_link_classes, read_link_counts, \
+    FlitCoefficients, LinkEnergyModel
+###############################################################################
+# The power results of a run, as stored next to the latencies
+POWER_KEYS = ['routerStaticPower', 'routerDynamicPower', 'linkEnergy']
+###############################################################################
+
+
+class PowerModel:
+    """
+    The power profile of a sweep, which is parsed once and evaluated on the
+    reports of each run.
+    """
+
+    def __init__(self, profile_path, network_path):
+        """
+        Parameters:
+            - profile_path: the power profile, see bin/power/power_profile.ini.
+            - network_path: the network.xml of the sweep, which gives the
+            layer of each router and the class of each link.
+        """
+        config = configparser.ConfigParser()
+        if not config.read(profile_path):
+            raise FileNotFoundError(profile_path)
+        self.router_layers = read_router_layers(network_path)
+        num_of_layers = self.router_layers.max() + 1
+        self.ni_s = make_list(config['Static']['ni'])
+        self.router_s = make_list(config['Static']['router'])
+        self.energies = np.array([make_list(config['Dynamic']['layer' + str(i)])
+                                  for i in range(num_of_layers)])
+        self.link_classes, self.link_class = read_link_classes(network_path)
+        self.links = LinkEnergyModel(FlitCoefficients(
+                float(config['Links'].get('flit', '0'))))
+
+    def link_energy(self, counts):
+        """
+        Compute the energy of the links of a run.
+
+        Parameters:
+            - counts: the (links, states, states) transition counts.
+
+        Return:
+            - The energy of all links.
+        """
+        return self.links.energy(counts, self.link_classes,
+                                 self.link_class).sum()
+
+    def run_power(self, simdir):
+        """
+        Estimate the power of a finished run from its reports.
+
+        Parameters:
+            - simdir: the directory of the run.
+
+        Return:
+            - A dictionary of POWER_KEYS, nan for the reports which are
+            missing.
+        """
+        power = dict.fromkeys(POWER_KEYS, np.nan)
+        report = os.path.join(simdir, 'report.txt')
+        if os.path.exists(report):
+            power['routerStaticPower'] = static_power(
+                    read_clock_counts(report), self.ni_s, self.router_s)
+        routers = os.path.join(simdir, 'report_Routers_Power.csv')
+        if os.path.exists(routers):
+            power['routerDynamicPower'] = float(dynamic_power(
+                    read_event_counts(routers), self.energies,
+                    self.router_layers).sum())
+        links = os.path.join(simdir, 'report_Links.csv')
+        if os.path.exists(links):
+            power['linkEnergy'] = float(self.link_energy(
+                    read_link_counts(links)))
+        return power
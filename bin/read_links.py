@@ -20,26 +20,30 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-# This script generates simple topology files for 2D or 3D meshes
+# This script reads the link matrices of report_Links.csv
 ###############################################################################
-import sys
-import pandas as pd
+import argparse
+import numpy as np
+from power.link_energy import read_link_counts
 ###############################################################################
-links_lst = []
 
 
-def reshape(vec):
-    global links_lst
-    links_lst.append(vec.values.reshape(13, 13))
-###############################################################################
+def main():
+    parser = argparse.ArgumentParser(
+            description='Print the transition matrix of a link')
+    parser.add_argument('csv_file', help='the path to the links csv file')
+    parser.add_argument('--link', type=int, default=303,
+                        help='the id of the link to be printed')
+    parser.add_argument('--traffic-types', type=int, default=None,
+                        help='the numberOfTrafficTypes of the simulation')
+    parser.add_argument('--cache', default=None,
+                        help='a folder in which the parsed matrices are kept')
+    args = parser.parse_args()
 
+    links = read_link_counts(args.csv_file, args.traffic_types,
+                             cache_dir=args.cache)
+    print(np.asarray(links[args.link]))
 
-try:
-    csv_file = sys.argv[1]
-except Exception:
-    print('Please provide the path to the links csv file.')
-    exit()
 
-df = pd.read_csv(csv_file, index_col=0)
-df.apply(reshape, axis=1)
-print(links_lst[303])
+if __name__ == '__main__':
+    main()
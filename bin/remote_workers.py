@@ -0,0 +1,178 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script distributes the simulations of a sweep to sim_worker.py
+# processes on other hosts
+###############################################################################
+import json
+import shlex
+import itertools
+import threading
+import subprocess
+from concurrent.futures import Future
+from result_cache import file_digest
+from sim_worker import unpack_artifacts
+###############################################################################
+
+
+class WorkerConnection:
+    """
+    A running sim_worker.py, started by a command such as
+    'ssh node1 python3 ratatoskr/bin/sim_worker.py --sim ratatoskr/sim'.
+    """
+
+    def __init__(self, command):
+        """
+        Start the worker and read its greeting.
+
+        Parameters:
+            - command: the command line which starts the worker.
+        """
+        self.command = command
+        self.process = subprocess.Popen(shlex.split(command),
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        universal_newlines=True)
+        hello = json.loads(self.process.stdout.readline())
+        self.jobs = hello['jobs']
+        self.binary = hello['binary']
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.reader = threading.Thread(target=self.read_results, daemon=True)
+        self.reader.start()
+
+    def read_results(self):
+        """ Resolve the futures of the jobs as their results arrive """
+        for line in self.process.stdout:
+            message = json.loads(line)
+            with self.lock:
+                future = self.futures.pop(message['id'])
+            if 'error' in message:
+                future.set_exception(RuntimeError(
+                        self.command + ': ' + message['error']))
+            else:
+                future.set_result(message)
+        # The worker is gone, fail all jobs which are still running.
+        with self.lock:
+            futures, self.futures = self.futures, {}
+        for future in futures.values():
+            future.set_exception(RuntimeError(self.command + ' exited'))
+
+    def num_running(self):
+        """ Return the number of jobs the worker is running """
+        with self.lock:
+            return len(self.futures)
+
+    def submit(self, job):
+        """ Send a job descriptor and return the future of its result """
+        future = Future()
+        with self.lock:
+            self.futures[job['id']] = future
+            self.process.stdin.write(json.dumps(job) + '\n')
+            self.process.stdin.flush()
+        return future
+
+    def close(self):
+        """ Let the worker finish and exit """
+        self.process.stdin.close()
+        self.process.wait()
+###############################################################################
+
+
+class WorkerPool:
+    """
+    Run simulations on a set of workers.
+
+    Each job ships the rendered config.xml and the topology file. The worker
+    runs them with its own simulator binary and only returns the result
+    files of the run (see result_cache.ARTIFACTS).
+    """
+
+    def __init__(self, commands, binary):
+        """
+        Start all workers.
+
+        Parameters:
+            - commands: a list of the command lines which start the workers.
+            - binary: the path of the local simulator, all workers must run
+            a binary with the same content, so cached results stay valid.
+        """
+        self.connections = [WorkerConnection(c) for c in commands]
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        digest = file_digest(binary)
+        for connection in self.connections:
+            if connection.binary != digest:
+                self.close()
+                raise RuntimeError(connection.command +
+                                   ' runs a different simulator binary')
+
+    def __len__(self):
+        """ Return the number of simulations which can run at once """
+        return sum(c.jobs for c in self.connections)
+
+    def run(self, configFile, topologyFile, simdir, maxBacklog=0,
+            startTime=0, files=()):
+        """
+        Run a simulation on the least loaded worker. Like a local run, it
+        raises a subprocess.CalledProcessError if the simulator fails.
+
+        Parameters:
+            - configFile: the path of the rendered config.xml.
+            - topologyFile: the path of its topology file.
+            - simdir: the directory the result files are written to.
+            - maxBacklog: see saturation_monitor.wait_or_kill, 0 disables it.
+            - startTime: see saturation_monitor.wait_or_kill.
+            - files: the routing tables the config refers to, they are
+            shipped with the job.
+
+        Return:
+            - True if the simulation has been killed as saturated.
+        """
+        with open(configFile) as f:
+            config = f.read()
+        with open(topologyFile) as f:
+            network = f.read()
+        tables = {}
+        for path in files:
+            with open(path) as f:
+                tables[path] = f.read()
+        with self.lock:
+            connection = min(self.connections,
+                             key=lambda c: c.num_running() / c.jobs)
+            job = {'id': next(self.ids), 'config': config,
+                   'network': network, 'files': tables,
+                   'maxBacklog': maxBacklog,
+                   'startTime': startTime}
+            future = connection.submit(job)
+        result = future.result()
+        # fail like a local run, see run_simulation.run_indivisual_sim
+        if result['returncode'] != 0 and not result['saturated']:
+            raise subprocess.CalledProcessError(result['returncode'],
+                                                connection.command)
+        unpack_artifacts(result['artifacts'], simdir)
+        return result['saturated']
+
+    def close(self):
+        """ Stop all workers """
+        for connection in self.connections:
+            connection.close()
@@ -0,0 +1,292 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script collects the database reports of the simulator, see
+# simulator/src/utils/Report.cpp, into one SQLite file per run. Start it
+# before the simulations, which connect to 127.0.0.1:10000.
+###############################################################################
+import os
+import re
+import time
+import sqlite3
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+###############################################################################
+# The end of a record and the separator of its fields
+RECORD_END = b'|'
+FIELD_SEP = ';'
+# The number of fields of each record type, the last one may contain FIELD_SEP
+FIELDS = {'run': 1, 'reg': 3, 'rep': 4, 'att': 3}
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS run (name TEXT, peer TEXT, start REAL, end REAL);
+CREATE TABLE IF NOT EXISTS elements
+    (element INTEGER PRIMARY KEY, type TEXT, id INTEGER);
+CREATE TABLE IF NOT EXISTS attributes (element INTEGER, name TEXT, value TEXT);
+CREATE TABLE IF NOT EXISTS events
+    (element INTEGER, time INTEGER, event TEXT, data TEXT);
+"""
+# Created when a run is finished, so they do not slow down the inserts
+INDICES = """
+CREATE INDEX IF NOT EXISTS attributes_element ON attributes (element);
+CREATE INDEX IF NOT EXISTS events_element ON events (element, time);
+"""
+###############################################################################
+
+
+class RecordParser:
+    """
+    Split the byte stream of a simulation into records.
+
+    The stream arrives in chunks of any size, so a record may be split
+    between two chunks. The incomplete end of a chunk is kept until the
+    rest of the record arrives.
+    """
+
+    def __init__(self):
+        self.pending = b''
+        self.malformed = 0
+
+    def feed(self, chunk):
+        """
+        Parse the complete records of a chunk.
+
+        Parameters:
+            - chunk: the bytes received from the simulator.
+
+        Return:
+            - A list of (type, fields) tuples, e.g. ('rep', ['12', '3000',
+            'event', 'data']). Malformed records are counted and skipped.
+        """
+        records = (self.pending + chunk).split(RECORD_END)
+        self.pending = records.pop()
+        parsed = []
+        for record in records:
+            kind, _, rest = record.decode(errors='replace').partition(
+                FIELD_SEP)
+            if kind not in FIELDS:
+                if kind:
+                    self.malformed += 1
+                continue
+            fields = rest.split(FIELD_SEP, FIELDS[kind] - 1)
+            if len(fields) != FIELDS[kind]:
+                self.malformed += 1
+                continue
+            parsed.append((kind, fields))
+        return parsed
+###############################################################################
+
+
+class RunPartition:
+    """
+    The SQLite file of one run.
+
+    The records are inserted in batches, each of which is one transaction.
+    The partition is only used by the writer thread of the collector.
+    """
+
+    def __init__(self, path, name, peer):
+        """
+        Parameters:
+            - path: the path of the SQLite file.
+            - name: the name of the run, the working directory of the
+            simulation.
+            - peer: the address of the simulation.
+        """
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=OFF')
+        self.db.executescript(SCHEMA)
+        with self.db:
+            self.db.execute('INSERT INTO run VALUES (?, ?, ?, NULL)',
+                            (name, peer, time.time()))
+
+    def write(self, records):
+        """ Insert a list of records of RecordParser.feed """
+        elements, attributes, events = [], [], []
+        for kind, fields in records:
+            if kind == 'rep':
+                events.append(fields)
+            elif kind == 'att':
+                attributes.append(fields)
+            elif kind == 'reg':
+                elements.append(fields)
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO elements VALUES '
+                                '(?, ?, ?)', elements)
+            self.db.executemany('INSERT INTO attributes VALUES (?, ?, ?)',
+                                attributes)
+            self.db.executemany('INSERT INTO events VALUES (?, ?, ?, ?)',
+                                events)
+
+    def close(self):
+        """ Index the run and close the file """
+        with self.db:
+            self.db.execute('UPDATE run SET end = ?', (time.time(),))
+        self.db.executescript(INDICES)
+        self.db.close()
+###############################################################################
+
+
+def partition_path(directory, name):
+    """
+    Return an unused path of a SQLite file in directory, named after the
+    last folder of the run name.
+    """
+    slug = re.sub(r'[^\w.-]+', '_', os.path.basename(name.rstrip('/')))
+    slug = slug or 'run'
+    path = os.path.join(directory, slug + '.sqlite')
+    number = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, '%s_%d.sqlite' % (slug, number))
+        number += 1
+    return path
+###############################################################################
+
+
+class ReportCollector:
+    """
+    An asyncio server which receives the reports of many simulations.
+
+    Each connection is one run. Its records are parsed as they arrive and
+    written in batches by a single writer thread, so the event loop keeps
+    receiving while SQLite writes. A connection waits for the write of its
+    previous batch before it sends the next one, which limits the records
+    held in memory.
+    """
+
+    def __init__(self, directory, batch=10000):
+        """
+        Parameters:
+            - directory: the folder of the SQLite files.
+            - batch: the number of records written per transaction.
+        """
+        self.directory = directory
+        self.batch = batch
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        os.makedirs(directory, exist_ok=True)
+
+    async def write(self, function, *args):
+        """ Run a function in the writer thread """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.writer, function, *args)
+
+    async def open_partition(self, name, peer):
+        """ Create the SQLite file of a run """
+        def create():
+            return RunPartition(partition_path(self.directory, name), name,
+                                peer)
+        return await self.write(create)
+
+    async def handle(self, reader, writer):
+        """ Receive the records of one simulation until it disconnects """
+        peer = '%s:%s' % writer.get_extra_info('peername')[:2]
+        parser = RecordParser()
+        partition = None
+        name = None
+        records = []
+        count = 0
+        pending = None
+        try:
+            while True:
+                chunk = await reader.read(1 << 16)
+                if chunk:
+                    records += parser.feed(chunk)
+                if len(records) < self.batch and chunk:
+                    continue
+                if partition is None and records:
+                    # Report::connect registers itself before the run starts
+                    name = next((f[0] for kind, f in records
+                                 if kind == 'run'), peer)
+                    partition = await self.open_partition(name, peer)
+                if pending is not None:
+                    await pending
+                    pending = None
+                if records:
+                    pending = asyncio.ensure_future(
+                        self.write(partition.write, records))
+                    count += len(records)
+                    records = []
+                if not chunk:
+                    break
+        finally:
+            if pending is not None:
+                await pending
+            if partition is not None:
+                await self.write(partition.write, records)
+                count += len(records)
+                await self.write(partition.close)
+                print('Collected ' + str(count) + ' records of ' + name +
+                      ' into ' + partition.path)
+            if parser.malformed:
+                print('Skipped ' + str(parser.malformed) +
+                      ' malformed records of ' + str(name or peer))
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=10000):
+        """ Accept simulations until the task is cancelled """
+        server = await asyncio.start_server(self.handle, host, port)
+        print('Collecting database reports on ' + host + ':' + str(port))
+        async with server:
+            await server.serve_forever()
+###############################################################################
+
+
+def read_timeline(path, element):
+    """
+    Read the events of one element of a run.
+
+    Parameters:
+        - path: the SQLite file of the run.
+        - element: the element id, as registered by the simulator.
+
+    Return:
+        - A list of (time in ps, event, data) tuples, ordered by time.
+    """
+    with sqlite3.connect(path) as db:
+        return db.execute('SELECT time, event, data FROM events WHERE '
+                          'element = ? ORDER BY time', (element,)).fetchall()
+###############################################################################
+
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='Collect the database reports of the simulator')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='the address to listen on')
+    parser.add_argument('--port', type=int, default=10000,
+                        help='the port to listen on')
+    parser.add_argument('--directory', default='report_db',
+                        help='the folder of the SQLite files, one per run')
+    parser.add_argument('--batch', type=int, default=10000,
+                        help='the number of records written per transaction')
+    args = parser.parse_args()
+    collector = ReportCollector(args.directory, args.batch)
+    try:
+        asyncio.run(collector.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script decides how many restarts of an injection rate are needed
+###############################################################################
+import numpy as np
+from scipy import stats
+###############################################################################
+
+
+def ci_half_width(samples, confidence):
+    """
+    Compute the half-width of the confidence interval of the mean.
+
+    Parameters:
+        - samples: the latencies of the finished runs.
+        - confidence: the confidence level, e.g. 0.95.
+
+    Return:
+        - The half-width based on Student's t-distribution, inf for less
+        than two samples.
+    """
+    n = len(samples)
+    if n < 2:
+        return np.inf
+    t = stats.t.ppf((1 + confidence) / 2, n - 1)
+    return t * np.std(samples, ddof=1) / np.sqrt(n)
+###############################################################################
+
+
+def is_converged(latencies, tolerance, confidence):
+    """
+    Check if the restarts of an injection rate have converged.
+
+    Parameters:
+        - latencies: a list of the flit, packet and network latency arrays
+        of one rate, nan for restarts which have not been run and -1 for
+        failed runs.
+        - tolerance: the maximum half-width of the confidence interval
+        relative to the mean.
+        - confidence: the confidence level, e.g. 0.95.
+
+    Return:
+        - True if the confidence intervals of all latencies are narrow
+        enough, False otherwise.
+    """
+    for lats in latencies:
+        valid = lats[lats >= 0]
+        if len(valid) < 2:
+            return False
+        if ci_half_width(valid, confidence) > tolerance * np.mean(valid):
+            return False
+    return True
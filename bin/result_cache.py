@@ -0,0 +1,271 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script caches the result files of individual simulations on disk
+###############################################################################
+import os
+import fcntl
+import shutil
+import hashlib
+import uuid
+###############################################################################
+# The result files and folders of a run which are kept in the cache.
+ARTIFACTS = ['report_Performance.csv', 'report_Links.csv',
+             'report_Routers_Power.csv', 'report.txt', 'VCUsage', 'BuffUsage']
+# Memoized file digests of this process, see file_digest.
+file_digests = {}
+# The files of the running total size of the cache and of its lock
+SIZE_FILE = 'size'
+LOCK_FILE = 'lock'
+# An eviction shrinks the cache to this fraction of its maximum size, so the
+# following runs can be stored without scanning the cache again.
+LOW_WATER = 0.9
+###############################################################################
+
+
+def file_digest(path):
+    """
+    Get the sha256 digest of a file.
+
+    The digest is memoized per process as long as the size and modification
+    time of the file do not change, so the simulator binary is only hashed
+    once per worker.
+
+    Parameters:
+        - path: the path of the file.
+
+    Return:
+        - The hex digest of the file content.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in file_digests:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        file_digests[memo_key] = sha.hexdigest()
+    return file_digests[memo_key]
+###############################################################################
+
+
+def dir_size(path):
+    """ Get the size of all files below a directory in bytes """
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+###############################################################################
+
+
+class ResultCache:
+    """
+    A content-addressed on-disk cache of simulation results.
+
+    An entry is keyed on the hash of the rendered config.xml, the topology
+    file, the simulator binary, the seed and the other input files (routing
+    tables) of the run. The least recently used entries are evicted once the
+    cache exceeds its maximum size.
+
+    The total size is kept in a file next to the entries, which all
+    processes sharing the cache update under a lock. Only an eviction scans
+    the whole cache, and it recounts the total.
+    """
+
+    def __init__(self, path, max_size):
+        """
+        Initialize the cache.
+
+        Parameters:
+            - path: the root directory of the cache.
+            - max_size: the maximum size of the cache in bytes.
+        """
+        self.path = path
+        self.max_size = max_size
+        os.makedirs(self.path, exist_ok=True)
+
+    def make_key(self, config_file, topology_file, binary, seed, files=()):
+        """
+        Compute the key of a run.
+
+        Parameters:
+            - config_file: the path of the rendered config.xml.
+            - topology_file: the path of the topology (network) file.
+            - binary: the path of the simulator executable.
+            - seed: the seed of the run.
+            - files: the paths of further input files of the run, e.g. the
+            routing tables.
+
+        Return:
+            - The key as a hex string.
+        """
+        sha = hashlib.sha256()
+        for path in (config_file, topology_file, binary, *files):
+            sha.update(file_digest(path).encode())
+        sha.update(str(seed).encode())
+        return sha.hexdigest()
+
+    def entry_path(self, key):
+        """ Get the directory of an entry """
+        return os.path.join(self.path, key[:2], key)
+
+    def fetch(self, key, simdir):
+        """
+        Copy the cached result files of a run into a simulation directory.
+
+        Parameters:
+            - key: the key of the run.
+            - simdir: the destination directory.
+
+        Return:
+            - True on a cache hit, False otherwise.
+        """
+        entry = self.entry_path(key)
+        if not os.path.isdir(entry):
+            return False
+        try:
+            for name in os.listdir(entry):
+                src = os.path.join(entry, name)
+                dst = os.path.join(simdir, name)
+                if os.path.isdir(src):
+                    shutil.rmtree(dst, ignore_errors=True)
+                    shutil.copytree(src, dst)
+                else:
+                    shutil.copy(src, dst)
+            os.utime(entry)  # mark as recently used
+        except FileNotFoundError:
+            # the entry was evicted by another process meanwhile
+            return False
+        return True
+
+    def store(self, key, simdir):
+        """
+        Store the result files of a finished run.
+
+        Runs without a performance report (failed runs) are not stored.
+
+        Parameters:
+            - key: the key of the run.
+            - simdir: the directory of the finished run.
+
+        Return:
+            - None.
+        """
+        if not os.path.exists(os.path.join(simdir, 'report_Performance.csv')):
+            return
+        entry = self.entry_path(key)
+        if os.path.isdir(entry):
+            return
+        tmp = os.path.join(self.path, 'tmp-' + uuid.uuid4().hex)
+        os.makedirs(tmp)
+        for name in ARTIFACTS:
+            src = os.path.join(simdir, name)
+            if os.path.isdir(src):
+                shutil.copytree(src, os.path.join(tmp, name))
+            elif os.path.exists(src):
+                shutil.copy(src, tmp)
+        size = dir_size(tmp)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        try:
+            os.rename(tmp, entry)  # atomic, readers never see half entries
+        except OSError:
+            # another process stored the same run meanwhile
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        with self.locked():
+            total = self.read_size()
+            if total is None or total + size > self.max_size:
+                self.evict()
+            else:
+                self.write_size(total + size)
+
+    def locked(self):
+        """ Return a context which holds the lock of the cache """
+        return CacheLock(os.path.join(self.path, LOCK_FILE))
+
+    def read_size(self):
+        """ Get the running total size in bytes, None if it is unknown """
+        try:
+            with open(os.path.join(self.path, SIZE_FILE)) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def write_size(self, total):
+        """ Set the running total size in bytes """
+        tmp = os.path.join(self.path, SIZE_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            f.write(str(total))
+        os.replace(tmp, os.path.join(self.path, SIZE_FILE))
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the size is below
+        LOW_WATER of the maximum size, and recount the running total.
+        Must be called with the lock held, see locked.
+        """
+        entries = []
+        total = 0
+        for prefix in os.listdir(self.path):
+            prefix_path = os.path.join(self.path, prefix)
+            if prefix.startswith('tmp-') or not os.path.isdir(prefix_path):
+                continue
+            for key in os.listdir(prefix_path):
+                entry = os.path.join(prefix_path, key)
+                try:
+                    mtime = os.path.getmtime(entry)
+                except OSError:
+                    continue
+                size = dir_size(entry)
+                entries.append((mtime, size, entry))
+                total += size
+        entries.sort()
+        if total > self.max_size:
+            for mtime, size, entry in entries:
+                if total <= self.max_size * LOW_WATER:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+        self.write_size(total)
+###############################################################################
+
+
+class CacheLock:
+    """ An exclusive lock on a file, shared by all processes of a host """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+        self.file = None
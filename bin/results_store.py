@@ -0,0 +1,296 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script stores the results of sweeps as one Parquet table per metric
+###############################################################################
+import os
+import numpy as np
+import pandas as pd
+from power_stage import POWER_KEYS
+###############################################################################
+# The layout of a store is <store>/<metric>/experiment=<name>/data.parquet,
+# so the tables of many experiments can be read and filtered together.
+METRICS = ['latencies', 'VCUsage', 'BuffUsage']
+###############################################################################
+
+
+def latencies_table(results):
+    """
+    Convert the latencies of a sweep into a table.
+
+    Parameters:
+        - results: a dictionary of the results of a sweep.
+
+    Return:
+        - A dataframe with one row per injection rate and restart which
+        has been run.
+    """
+    latenciesFlit = np.asarray(results['latenciesFlit'], dtype=float)
+    num_rates, num_restarts = latenciesFlit.shape
+    df = pd.DataFrame({
+        'injectionRate': np.repeat(results['injectionRates'], num_restarts),
+        'restart': np.tile(np.arange(num_restarts), num_rates),
+        'flit': latenciesFlit.ravel(),
+        'packet': np.asarray(results['latenciesPacket'], dtype=float).ravel(),
+        'network': np.asarray(results['latenciesNetwork'], dtype=float).ravel()})
+    if 'saturated' in results:
+        df['saturated'] = np.asarray(results['saturated'], dtype=bool).ravel()
+    if 'seeds' in results:
+        df['seed'] = np.asarray(results['seeds'], dtype=np.int64).ravel()
+    for key in POWER_KEYS:
+        if key in results:
+            df[key] = np.asarray(results[key], dtype=float).ravel()
+    return df.dropna(subset=['flit', 'packet', 'network'], how='all')
+###############################################################################
+
+
+def VCUsage_table(results):
+    """
+    Convert the VC usage statistics of a sweep into a table.
+
+    Parameters:
+        - results: a dictionary of the results of a sweep.
+
+    Return:
+        - A dataframe with one row per injection rate, layer, direction and
+        number of VCs, holding the mean and std over the restarts.
+    """
+    frames = []
+    for rate, layers in zip(results['injectionRates'], results['VCUsage']):
+        for layer, df in enumerate(layers):
+            for direction in df.columns.get_level_values(0).unique():
+                frames.append(pd.DataFrame({
+                    'injectionRate': rate,
+                    'layer': layer,
+                    'direction': str(direction),
+                    'numVCs': df.index.values,
+                    'mean': df[direction, 'mean'].values,
+                    'std': df[direction, 'std'].values}))
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+###############################################################################
+
+
+def BuffUsage_table(results):
+    """
+    Convert the buffer usage histograms of a sweep into a table.
+
+    Parameters:
+        - results: a dictionary of the results of a sweep.
+
+    Return:
+        - A dataframe with one row per injection rate, layer, direction,
+        buffer occupation and VC.
+    """
+    frames = []
+    for rate, layers in zip(results['injectionRates'], results['BuffUsage']):
+        for layer, name in enumerate(layers):
+            for direction, df in layers[name].items():
+                if df.empty:
+                    continue
+                num_buffers, num_vcs = df.shape
+                frames.append(pd.DataFrame({
+                    'injectionRate': rate,
+                    'layer': layer,
+                    'layerName': name,
+                    'direction': direction,
+                    'buffer': np.repeat(df.index.values, num_vcs),
+                    'vc': np.tile(df.columns.astype(int), num_buffers),
+                    'count': df.values.ravel()}))
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+###############################################################################
+
+
+def save_results(results, store, experiment):
+    """
+    Save the results of a sweep into a results store.
+
+    Parameters:
+        - results: a dictionary of the results of a sweep.
+        - store: the root directory of the store.
+        - experiment: the name of the experiment, e.g. the sweep folder.
+
+    Return:
+        - None.
+    """
+    tables = {'latencies': latencies_table(results),
+              'VCUsage': VCUsage_table(results),
+              'BuffUsage': BuffUsage_table(results)}
+    for metric, df in tables.items():
+        if df is None:
+            continue
+        path = os.path.join(store, metric, 'experiment=' + experiment)
+        os.makedirs(path, exist_ok=True)
+        df.to_parquet(os.path.join(path, 'data.parquet'), index=False)
+###############################################################################
+
+
+def read_metric(store, metric, columns=None, experiments=None):
+    """
+    Read the table of one metric, only loading the requested data.
+
+    Parameters:
+        - store: the root directory of the store.
+        - metric: one of METRICS.
+        - columns: the columns to be read, all by default.
+        - experiments: a list of experiment names, all by default.
+
+    Return:
+        - A dataframe, its 'experiment' column names the experiment.
+    """
+    path = os.path.join(store, metric)
+    if not os.path.isdir(path):
+        return pd.DataFrame()
+    filters = None
+    if experiments is not None:
+        filters = [('experiment', 'in', list(experiments))]
+    if columns is not None and 'experiment' not in columns:
+        columns = list(columns) + ['experiment']
+    df = pd.read_parquet(path, columns=columns, filters=filters)
+    df['experiment'] = df['experiment'].astype(str)
+    return df
+###############################################################################
+
+
+def list_experiments(store):
+    """ List the names of the experiments in a store """
+    path = os.path.join(store, 'latencies')
+    if not os.path.isdir(path):
+        return []
+    return sorted(d.split('=', 1)[1] for d in os.listdir(path)
+                  if d.startswith('experiment='))
+###############################################################################
+
+
+def load_results(store, experiment=None, metrics=METRICS):
+    """
+    Load the results of one experiment in the format of rawResults.pkl.
+
+    Parameters:
+        - store: the root directory of the store.
+        - experiment: the name of the experiment, by default the one saved
+        last.
+        - metrics: the metrics to be loaded.
+
+    Return:
+        - results: a dictionary of the results.
+    """
+    if not os.path.isdir(store):
+        raise FileNotFoundError('no results store at ' + store)
+    experiments = list_experiments(store)
+    if not experiments:
+        raise ValueError('the results store ' + store +
+                         ' has no experiments')
+    if experiment is None:
+        experiment = max(experiments, key=lambda e: os.path.getmtime(
+            os.path.join(store, 'latencies', 'experiment=' + e,
+                         'data.parquet')))
+    elif experiment not in experiments:
+        raise ValueError('the results store ' + store + ' has no experiment '
+                         + experiment + ', only ' + ', '.join(experiments))
+    lat = read_metric(store, 'latencies', experiments=[experiment])
+    lat = lat.sort_values(['injectionRate', 'restart'])
+    injectionRates = sorted(lat['injectionRate'].unique())
+    results = {'injectionRates': injectionRates}
+    for key, column in [('latenciesFlit', 'flit'),
+                        ('latenciesPacket', 'packet'),
+                        ('latenciesNetwork', 'network')]:
+        results[key] = lat.pivot(index='injectionRate', columns='restart',
+                                 values=column).values
+    if 'saturated' in lat:
+        results['saturated'] = lat.pivot(
+                index='injectionRate', columns='restart',
+                values='saturated').fillna(False).values.astype(bool)
+    if 'seed' in lat:
+        # restarts which have not been run have no seed, they stay nan
+        results['seeds'] = lat.pivot(index='injectionRate', columns='restart',
+                                     values='seed').values
+    for key in POWER_KEYS:
+        if key in lat:
+            results[key] = lat.pivot(index='injectionRate', columns='restart',
+                                     values=key).values
+
+    if 'VCUsage' in metrics:
+        df = read_metric(store, 'VCUsage', experiments=[experiment])
+        results['VCUsage'] = []
+        for rate in injectionRates:
+            layers = []
+            if df.empty:
+                results['VCUsage'].append(layers)
+                continue
+            rate_df = df[df['injectionRate'] == rate]
+            for layer, layer_df in rate_df.groupby('layer', sort=True):
+                wide = layer_df.pivot(index='numVCs', columns='direction',
+                                      values=['mean', 'std'])
+                wide = wide.swaplevel(axis=1)[
+                    [(d, stat) for d in layer_df['direction'].unique()
+                     for stat in ('mean', 'std')]]
+                wide.columns.names = ['Direction', None]
+                wide.index.name = 'Number of VCs'
+                layers.append(wide)
+            results['VCUsage'].append(layers)
+
+    if 'BuffUsage' in metrics:
+        df = read_metric(store, 'BuffUsage', experiments=[experiment])
+        results['BuffUsage'] = []
+        for rate in injectionRates:
+            layers = {}
+            if df.empty:
+                results['BuffUsage'].append(layers)
+                continue
+            rate_df = df[df['injectionRate'] == rate]
+            for (layer, name), layer_df in rate_df.groupby(
+                    ['layer', 'layerName'], sort=True):
+                layers[name] = {}
+                for direction, dir_df in layer_df.groupby('direction',
+                                                          sort=False):
+                    wide = dir_df.pivot(index='buffer', columns='vc',
+                                        values='count')
+                    wide.columns = [str(vc) for vc in wide.columns]
+                    wide.index.name = 'Buffer\\VC'
+                    layers[name][direction] = wide
+            results['BuffUsage'].append(layers)
+    return results
+###############################################################################
+
+
+def valid_latencies(results, key):
+    """
+    Return the latencies of key as an array, with nan for the runs which
+    failed, saturated or have been skipped. They are stored as -1, which
+    must not be averaged into the latency curve.
+    """
+    lats = np.array(results[key], dtype=float)
+    lats[lats < 0] = np.nan
+    return lats
+###############################################################################
+
+
+def saturated_rates(results):
+    """ Return a boolean array, True for the rates at which a run saturated """
+    if 'saturated' not in results:
+        return np.zeros(len(results['injectionRates']), dtype=bool)
+    return np.asarray(results['saturated'], dtype=bool).any(axis=1)
+###############################################################################
@@ -0,0 +1,48 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script assigns the seeds of the individual simulations of a sweep
+###############################################################################
+import hashlib
+###############################################################################
+
+
+def run_seed(seedBase, injectionRate, restart):
+    """
+    Derive the seed of a run, see <seed> in the general section of
+    config.xml.
+
+    The seed only depends on its arguments, so a run can be replayed, its
+    results can be cached, and two sweeps with the same seed base simulate
+    the same random traffic per injection rate and restart (common random
+    numbers).
+
+    Parameters:
+        - seedBase: the seed base of the sweep.
+        - injectionRate: the injection rate of the run.
+        - restart: the index of the restart.
+
+    Return:
+        - The seed, an unsigned 32 bit integer.
+    """
+    key = '%s/%.6g/%d' % (seedBase, injectionRate, restart)
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:4], 'little')
@@ -0,0 +1,85 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script folds the results of runs into running statistics
+###############################################################################
+import numpy as np
+import pandas as pd
+###############################################################################
+
+
+class RunningStats:
+    """
+    The running mean and variance of equally shaped dataframes.
+
+    Each run is folded in with Welford's algorithm as soon as it completes,
+    so the memory stays at the size of one dataframe however many runs are
+    added.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+
+    def add(self, df):
+        """
+        Fold in the dataframe of one run, empty dataframes are ignored.
+
+        Parameters:
+            - df: a dataframe of the same shape as the previous ones.
+
+        Return:
+            - None.
+        """
+        if df.empty:
+            return
+        values = df.astype(float)
+        self.count += 1
+        if self.mean is None:
+            self.mean = values
+            self.m2 = values * 0.0
+            return
+        delta = values - self.mean
+        self.mean = self.mean + delta / self.count
+        self.m2 = self.m2 + delta * (values - self.mean)
+
+    def frame(self):
+        """
+        Get the statistics in the format of df.groupby(df.index).agg(['mean',
+        'std']) over all added dataframes.
+
+        Return:
+            - A dataframe with a (column, 'mean'/'std') column index, or an
+            empty dataframe if nothing has been added.
+        """
+        if self.count == 0:
+            return pd.DataFrame()
+        if self.count > 1:
+            std = np.sqrt(self.m2 / (self.count - 1))
+        else:
+            std = self.m2 * np.nan
+        df = pd.concat({'mean': self.mean, 'std': std}, axis=1)
+        df = df.swaplevel(axis=1)[[(c, stat) for c in self.mean.columns
+                                   for stat in ('mean', 'std')]]
+        df.columns.names = [self.mean.columns.name, None]
+        return df
@@ -0,0 +1,92 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script stops simulations which have saturated the network
+###############################################################################
+import subprocess
+###############################################################################
+# The file the simulator writes every progressInterval ns into its working
+# directory, see NoC::writeProgress.
+PROGRESS_FILE = 'progress.csv'
+# Seconds between two checks of a running simulation.
+POLL_INTERVAL = 1
+###############################################################################
+
+
+def read_progress(progress_file):
+    """
+    Read the latest line of the progress file of a running simulation.
+
+    Parameters:
+        - progress_file: the path of the progress file.
+
+    Return:
+        - A tuple of the simulated time in ns and the number of undelivered
+        packets per processing element, or None if there is no line yet.
+    """
+    try:
+        with open(progress_file) as f:
+            lines = f.read().split('\n')
+    except FileNotFoundError:
+        return None
+    # The last line may still be written, only complete lines are used.
+    lines = [l for l in lines[1:-1] if l]
+    if not lines:
+        return None
+    values = lines[-1].split(',')
+    return float(values[0]), float(values[2])
+###############################################################################
+
+
+def wait_or_kill(process, progress_file, max_backlog, start_time):
+    """
+    Wait for a simulation, and kill it once it has saturated.
+
+    A run counts as saturated once the undelivered packets per processing
+    element exceed max_backlog after start_time. Below saturation the
+    backlog stays well below one packet, above it the backlog grows
+    without bound.
+
+    Parameters:
+        - process: the subprocess.Popen of the simulation.
+        - progress_file: the path of its progress file.
+        - max_backlog: the allowed undelivered packets per processing element.
+        - start_time: the time in ns from which on the backlog is checked,
+        usually the start of the measurement phase.
+
+    Return:
+        - True if the simulation has been killed, False if it finished.
+    """
+    while True:
+        try:
+            process.wait(timeout=POLL_INTERVAL)
+            return False
+        except subprocess.TimeoutExpired:
+            pass
+        progress = read_progress(progress_file)
+        if progress is None:
+            continue
+        time, backlog = progress
+        if time >= start_time and backlog > max_backlog:
+            process.kill()
+            process.wait()
+            return True
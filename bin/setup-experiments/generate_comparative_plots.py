@@ -28,6 +28,10 @@ from PyPDF2 import PdfFileMerger
 import glob as glob
 import os
 import itertools
+import sys
+import warnings
+sys.path.insert(0, '..')
+import results_store
 ###############################################################################
 
 
@@ -41,30 +45,48 @@ def plot_latencies(results, comp):
     Return:
         - None.
     """
-    latenciesFlit = results['latenciesFlit']
-    latenciesNetwork = results['latenciesNetwork']
-    latenciesPacket = results['latenciesPacket']
-    latenciesFlitComp = comp['latenciesFlit']
-    latenciesNetworkComp = comp['latenciesNetwork']
-    latenciesPacketComp = comp['latenciesPacket']
+    latenciesFlit = results_store.valid_latencies(results, 'latenciesFlit')
+    latenciesNetwork = results_store.valid_latencies(results,
+                                                     'latenciesNetwork')
+    latenciesPacket = results_store.valid_latencies(results, 'latenciesPacket')
+    latenciesFlitComp = results_store.valid_latencies(comp, 'latenciesFlit')
+    latenciesNetworkComp = results_store.valid_latencies(comp,
+                                                         'latenciesNetwork')
+    latenciesPacketComp = results_store.valid_latencies(comp,
+                                                        'latenciesPacket')
     injectionRates = results['injectionRates']
-
-    meanLatenciesFlit = np.mean(latenciesFlit, axis=1)
-    meanLatenciesPacket = np.mean(latenciesPacket, axis=1)
-    meanLatenciesNetwork = np.mean(latenciesNetwork, axis=1)
-    stdLatenciesFlit = np.std(latenciesFlit, axis=1)
-    stdLatenciesPacket = np.std(latenciesPacket, axis=1)
-    stdLatenciesNetwork = np.std(latenciesNetwork, axis=1)
-
-    meanLatenciesFlitComp = np.mean(latenciesFlitComp, axis=1)
-    meanLatenciesPacketComp = np.mean(latenciesPacketComp, axis=1)
-    meanLatenciesNetworkComp = np.mean(latenciesNetworkComp, axis=1)
-    stdLatenciesFlitComp = np.std(latenciesFlitComp, axis=1)
-    stdLatenciesPacketComp = np.std(latenciesPacketComp, axis=1)
-    stdLatenciesNetworkComp = np.std(latenciesNetworkComp, axis=1)
+    saturated = results_store.saturated_rates(results)
+    saturatedComp = results_store.saturated_rates(comp)
+
+    # rates at which all runs saturated have no mean
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        meanLatenciesFlit = np.nanmean(latenciesFlit, axis=1)
+        meanLatenciesPacket = np.nanmean(latenciesPacket, axis=1)
+        meanLatenciesNetwork = np.nanmean(latenciesNetwork, axis=1)
+        stdLatenciesFlit = np.nanstd(latenciesFlit, axis=1)
+        stdLatenciesPacket = np.nanstd(latenciesPacket, axis=1)
+        stdLatenciesNetwork = np.nanstd(latenciesNetwork, axis=1)
+
+        meanLatenciesFlitComp = np.nanmean(latenciesFlitComp, axis=1)
+        meanLatenciesPacketComp = np.nanmean(latenciesPacketComp, axis=1)
+        meanLatenciesNetworkComp = np.nanmean(latenciesNetworkComp, axis=1)
+        stdLatenciesFlitComp = np.nanstd(latenciesFlitComp, axis=1)
+        stdLatenciesPacketComp = np.nanstd(latenciesPacketComp, axis=1)
+        stdLatenciesNetworkComp = np.nanstd(latenciesNetworkComp, axis=1)
 
     middle = meanLatenciesFlitComp + .5 * (meanLatenciesFlit - meanLatenciesFlitComp)
-    gain = (meanLatenciesFlit - meanLatenciesFlitComp)/meanLatenciesFlit
+    paired = paired_difference(results, comp, 'latenciesFlit')
+    if paired is None:
+        gain = (meanLatenciesFlit - meanLatenciesFlitComp)/meanLatenciesFlit
+        gainLabels = [str(int(g*100))+"%" if np.isfinite(g) else ''
+                      for g in gain]
+    else:
+        # runs with common seeds, the gain is estimated restart by restart
+        diff, stderr = paired
+        gain = diff/meanLatenciesFlit
+        gainLabels = ['%.0f±%.0f%%' % (g*100, e*100) for g, e
+                      in zip(gain, stderr/meanLatenciesFlit)]
 
     fig = plt.figure()
     plt.ylabel('Latencies in ns', fontsize=11)
@@ -89,15 +111,68 @@ def plot_latencies(results, comp):
                  color='k', **linestyle, marker='^')
 
     for i in range(len(injectionRates)):
-        plt.text(injectionRates[i], middle[i], str(int(gain[i]*100))+"%", fontsize='12')
-
-    plt.legend(['Base: Flit', 'Base: Packet', 'Comp: Flit', 'Comp: Packet'])
+        # no gain where all runs of a sweep saturated
+        if np.isfinite(gain[i]):
+            plt.text(injectionRates[i], middle[i], gainLabels[i], fontsize='12')
+
+    # the rates at which runs saturated are marked by dotted lines
+    handles = list(plt.gca().containers)
+    legend = ['Base: Flit', 'Base: Packet', 'Comp: Flit', 'Comp: Packet']
+    rates = np.asarray(injectionRates)
+    for name, color, mask in [('Base', 'r', saturated),
+                              ('Comp', 'c', saturatedComp)]:
+        lines = [plt.axvline(rate, color=color, linestyle=':', linewidth=1)
+                 for rate in rates[mask]]
+        if lines:
+            handles.append(lines[0])
+            legend.append(name + ': Saturated')
+
+    plt.legend(handles, legend)
     fig.suptitle('Latencies', fontsize=16)
     # plt.show()
     fig.savefig('latencies.pdf')
 ###############################################################################
 
 
+def paired_difference(results, comp, key):
+    """
+    Compare the latencies of two sweeps restart by restart.
+
+    Runs of both sweeps with the same seed simulate the same random traffic,
+    so the difference of their latencies varies much less than the latencies
+    themselves (common random numbers).
+
+    Parameters:
+        - results: the results of the first sweep.
+        - comp: the results of the sweep it is compared to.
+        - key: the latency, e.g. 'latenciesFlit'.
+
+    Return:
+        - A tuple of the mean difference per injection rate and its standard
+        error, nan for rates without paired runs. None if the sweeps do not
+        share any seeds.
+    """
+    if 'seeds' not in results or 'seeds' not in comp:
+        return None
+    seeds = np.asarray(results['seeds'], dtype=float)
+    seedsComp = np.asarray(comp['seeds'], dtype=float)
+    if seeds.shape != seedsComp.shape:
+        return None
+    lats = np.asarray(results[key], dtype=float)
+    latsComp = np.asarray(comp[key], dtype=float)
+    # failed and saturated runs have a latency of -1
+    paired = (seeds == seedsComp) & (lats >= 0) & (latsComp >= 0)
+    if not paired.any():
+        return None
+    count = paired.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(paired, lats - latsComp, 0).sum(axis=1) / count
+        deviation = np.where(paired, lats - latsComp - mean[:, None], 0)
+        std = np.sqrt((deviation ** 2).sum(axis=1) / (count - 1))
+        return mean, std / np.sqrt(count)
+###############################################################################
+
+
 def plot_VCUsage_stats(inj_dfs, inj_rates):
     """
     Plot the VC usage statistics.
@@ -190,6 +265,25 @@ def read_raw_results(results_file):
 ###############################################################################
 
 
+def read_latencies(experiment_dir):
+    """
+    Read the latencies of an experiment. Only the latency table is loaded
+    from the results store, experiments which predate the store are read
+    from their pickle file.
+
+    Parameters:
+        - experiment_dir: the folder of the experiment.
+
+    Return:
+        - results: a dictionary of objects.
+    """
+    store = os.path.join(experiment_dir, 'results')
+    if os.path.isdir(store):
+        return results_store.load_results(store, metrics=['latencies'])
+    return read_raw_results(os.path.join(experiment_dir, 'rawResults.pkl'))
+###############################################################################
+
+
 def merge_pdfs(output_path):
     """Merge the generated reports in one pdf."""
     try:
@@ -214,9 +308,9 @@ def merge_pdfs(output_path):
 
 def main():
     """Main Point of Execution."""
-    resultsBaseline = read_raw_results('Baseline/rawResults.pkl')
-    resultsComp = read_raw_results('RQa/rawResults.pkl')
-    resultsAsync = read_raw_results('Asynchronous/rawResults.pkl')
+    resultsBaseline = read_latencies('Baseline')
+    resultsComp = read_latencies('RQa')
+    resultsAsync = read_latencies('Asynchronous')
 
     plot_latencies(resultsBaseline, resultsComp)
 
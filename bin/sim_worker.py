@@ -0,0 +1,162 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script runs simulations for a sweep on another host. It reads one job
+# per line as JSON from stdin and writes one result per line to stdout, so it
+# can be started locally or through ssh, e.g.
+#   ssh node1 python3 ratatoskr/bin/sim_worker.py --sim ratatoskr/simulator/sim
+###############################################################################
+import os
+import sys
+import io
+import json
+import base64
+import shutil
+import tarfile
+import tempfile
+import argparse
+import threading
+import subprocess
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from result_cache import ARTIFACTS, file_digest
+from config_template import routing_table_nodes
+from saturation_monitor import wait_or_kill, PROGRESS_FILE
+###############################################################################
+
+
+def pack_artifacts(simdir):
+    """
+    Pack the result files of a run.
+
+    Parameters:
+        - simdir: the directory of the finished run.
+
+    Return:
+        - The gzipped tar archive of the artifacts, base64 encoded.
+    """
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz') as tar:
+        for name in ARTIFACTS:
+            path = os.path.join(simdir, name)
+            if os.path.exists(path):
+                tar.add(path, arcname=name)
+    return base64.b64encode(buf.getvalue()).decode('ascii')
+###############################################################################
+
+
+def unpack_artifacts(data, simdir):
+    """ Unpack the result files of pack_artifacts into a directory """
+    buf = io.BytesIO(base64.b64decode(data))
+    with tarfile.open(fileobj=buf, mode='r:gz') as tar:
+        tar.extractall(simdir)
+###############################################################################
+
+
+def run_job(job, sim, workdir):
+    """
+    Run one simulation.
+
+    Parameters:
+        - job: the job descriptor, a dictionary of the id, the content of
+        config.xml, network.xml and the routing tables (keyed on their path
+        in config.xml) and the saturation limits.
+        - sim: the path of the simulator executable of this host.
+        - workdir: the parent folder of the run directories.
+
+    Return:
+        - The result message of the job.
+    """
+    simdir = tempfile.mkdtemp(prefix='job' + str(job['id']) + '_',
+                              dir=workdir)
+    try:
+        networkFile = os.path.join(simdir, 'network.xml')
+        with open(networkFile, 'w') as f:
+            f.write(job['network'])
+        configTree = ET.ElementTree(ET.fromstring(job['config']))
+        configTree.find('noc/nocFile').text = networkFile
+        tables = job.get('files', {})
+        for number, node in enumerate(routing_table_nodes(configTree)):
+            if node.get('value') in tables:
+                tableFile = os.path.join(simdir,
+                                         'table' + str(number) + '.txt')
+                with open(tableFile, 'w') as f:
+                    f.write(tables[node.get('value')])
+                node.set('value', tableFile)
+        configFile = os.path.join(simdir, 'config.xml')
+        configTree.write(configFile)
+
+        with open(os.path.join(simdir, 'log'), 'w') as outfile:
+            process = subprocess.Popen([sim, configFile], stdout=outfile,
+                                       cwd=simdir)
+            if job['maxBacklog'] > 0:
+                saturated = wait_or_kill(
+                        process, os.path.join(simdir, PROGRESS_FILE),
+                        job['maxBacklog'], job['startTime'])
+            else:
+                process.wait()
+                saturated = False
+        return {'id': job['id'], 'saturated': saturated,
+                'returncode': process.returncode,
+                'artifacts': pack_artifacts(simdir)}
+    finally:
+        shutil.rmtree(simdir, ignore_errors=True)
+###############################################################################
+
+
+def main():
+    """ Serve jobs from stdin until it is closed """
+    parser = argparse.ArgumentParser(description='Ratatoskr sweep worker')
+    parser.add_argument('--sim', required=True,
+                        help='the simulator executable of this host')
+    parser.add_argument('--jobs', type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='the number of concurrent simulations')
+    parser.add_argument('--workdir', default=None,
+                        help='the parent folder of the run directories')
+    args = parser.parse_args()
+    sim = os.path.abspath(args.sim)
+
+    lock = threading.Lock()
+
+    def reply(message):
+        with lock:
+            sys.stdout.write(json.dumps(message) + '\n')
+            sys.stdout.flush()
+
+    def serve(job):
+        try:
+            reply(run_job(job, sim, args.workdir))
+        except Exception as e:
+            reply({'id': job['id'], 'error': repr(e)})
+
+    reply({'jobs': args.jobs, 'binary': file_digest(sim)})
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        for line in sys.stdin:
+            if line.strip():
+                executor.submit(serve, json.loads(line))
+###############################################################################
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script schedules the individual simulations of a sweep
+###############################################################################
+from concurrent.futures import ProcessPoolExecutor, Future, wait,\
+    FIRST_COMPLETED
+###############################################################################
+
+
+class SweepScheduler:
+    """
+    Run the individual simulations of a whole sweep on one process pool.
+
+    All (injection rate, restart) pairs share the same pool, so no core idles
+    while the slowest restart of a rate finishes. Jobs can be submitted at any
+    time, also while the results of earlier jobs are consumed.
+    """
+
+    def __init__(self, num_cores, executor=None):
+        """
+        Initialize the scheduler.
+
+        Parameters:
+            - num_cores: the number of worker processes.
+            - executor: an optional concurrent.futures executor to be used
+            instead of a local process pool.
+        """
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=num_cores)
+        self.executor = executor
+        self.pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # after a failed run or Ctrl-C the queued runs are not started
+        self.shutdown(cancel=exc_type is not None)
+
+    def submit(self, key, fn, *args):
+        """
+        Submit a job to the pool.
+
+        Parameters:
+            - key: an identifier of the job, returned with its result.
+            - fn: the function to be executed by a worker.
+            - args: the arguments of fn.
+
+        Return:
+            - None.
+        """
+        future = self.executor.submit(fn, *args)
+        self.pending[future] = key
+
+    def complete(self, key, result):
+        """
+        Add a job whose result is already known, e.g. a skipped run.
+
+        Parameters:
+            - key: an identifier of the job, returned with its result.
+            - result: the result of the job.
+
+        Return:
+            - None.
+        """
+        future = Future()
+        future.set_result(result)
+        self.pending[future] = key
+
+    def cancel(self, predicate, result):
+        """
+        Cancel the jobs which have not been started yet.
+
+        Parameters:
+            - predicate: a function of the key, selects the jobs to cancel.
+            - result: the result returned for each cancelled job.
+
+        Return:
+            - The keys of the cancelled jobs.
+        """
+        cancelled = []
+        for future, key in list(self.pending.items()):
+            if predicate(key) and future.cancel():
+                del self.pending[future]
+                self.complete(key, result)
+                cancelled.append(key)
+        return cancelled
+
+    def num_pending(self):
+        """ Return the number of submitted but not yet consumed jobs """
+        return len(self.pending)
+
+    def results(self):
+        """
+        Yield the results of the jobs in the order they complete.
+
+        Jobs submitted while iterating are yielded as well. The iteration
+        ends when no job is pending anymore.
+
+        Return:
+            - A generator of (key, result) tuples.
+        """
+        while self.pending:
+            done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = self.pending.pop(future)
+                yield key, future.result()
+
+    def shutdown(self, cancel=False):
+        """
+        Wait for all workers and release the pool.
+
+        Parameters:
+            - cancel: if True, the jobs which have not been started yet are
+            cancelled, so only the running jobs are waited for.
+
+        Return:
+            - None.
+        """
+        if cancel:
+            for future in self.pending:
+                future.cancel()
+            self.pending = {}
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,323 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script builds topologies as graphs of routers, which are written as
+# network.xml by xml_writers.TopologyWriter. Topologies other than the full
+# mesh need the routing table mode of the simulator, see write_routing.
+###############################################################################
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import shortest_path
+###############################################################################
+# The direction codes of Direction_Mat.txt and RT.txt
+LOCAL, EAST, WEST, NORTH, SOUTH, UP, DOWN = range(7)
+DIRECTION_NAMES = ['Local', 'East', 'West', 'North', 'South', 'Up', 'Down']
+# The direction of a link as seen from its other end
+OPPOSITE = np.array([LOCAL, WEST, EAST, SOUTH, NORTH, DOWN, UP])
+# The placements of tsv_placement
+TSV_PLACEMENTS = ['full', 'corners', 'center', 'checkerboard', 'stride',
+                  'random']
+###############################################################################
+
+
+class Topology:
+    """
+    A network of routers, each of which has one processing element.
+
+    A router has one port per direction, so the links of a router must all
+    leave in different directions.
+    """
+
+    def __init__(self, positions, layers, links, directions):
+        """
+        Parameters:
+            - positions: an (n, 3) array of the x, y and z position of each
+            router, in [0, 1].
+            - layers: the layer of each router.
+            - links: an (m, 2) array of the routers connected by each link.
+            - directions: the direction of each link as seen from its first
+            router (EAST, NORTH or UP for the generators below).
+        """
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        self.layers = np.asarray(layers, dtype=int)
+        self.links = np.asarray(links, dtype=int).reshape(-1, 2)
+        self.directions = np.asarray(directions, dtype=int)
+        self.check_ports()
+
+    @property
+    def num_routers(self):
+        return len(self.layers)
+
+    @property
+    def num_layers(self):
+        return int(self.layers.max()) + 1
+
+    def check_ports(self):
+        """ Raise a ValueError if a router has two links in one direction """
+        ends = np.concatenate([self.links[:, 0], self.links[:, 1]])
+        dirs = np.concatenate([self.directions, OPPOSITE[self.directions]])
+        keys, counts = np.unique(ends * len(OPPOSITE) + dirs,
+                                 return_counts=True)
+        if (counts > 1).any():
+            router, direction = divmod(int(keys[counts > 1][0]),
+                                       len(OPPOSITE))
+            raise ValueError('router %d has more than one link to the %s'
+                             % (router, DIRECTION_NAMES[direction]))
+
+    def ports(self):
+        """
+        Return an (n, 7) array of the router behind each port of each
+        router, -1 for unused ports.
+        """
+        ports = np.full((self.num_routers, len(OPPOSITE)), -1)
+        ports[self.links[:, 0], self.directions] = self.links[:, 1]
+        ports[self.links[:, 1], OPPOSITE[self.directions]] = self.links[:, 0]
+        return ports
+
+    def direction_matrix(self):
+        """
+        Return the (n, n) matrix of Direction_Mat.txt: the direction of the
+        link from router i to router j, -1 if they are not connected.
+        """
+        matrix = np.full((self.num_routers, self.num_routers), -1)
+        matrix[self.links[:, 0], self.links[:, 1]] = self.directions
+        matrix[self.links[:, 1], self.links[:, 0]] = \
+            OPPOSITE[self.directions]
+        return matrix
+
+    def routing_table(self):
+        """
+        Compute the routing table of RT.txt: the output direction at router
+        src towards router dst is at [dst, src].
+
+        The routes are minimal. Among the minimal next hops, the x
+        directions are preferred over y and y over z, which gives XYZ
+        routing on a mesh. Minimal routes are not deadlock free on every
+        topology, e.g. on a torus without dateline virtual channels.
+
+        Return:
+            - An (n, n) array of direction codes.
+        """
+        graph = csr_matrix((np.ones(len(self.links)),
+                            (self.links[:, 0], self.links[:, 1])),
+                           shape=(self.num_routers, self.num_routers))
+        dist = shortest_path(graph, directed=False, unweighted=True)
+        if np.isinf(dist).any():
+            raise ValueError('the topology is not connected')
+        table = np.full(dist.shape, -1)
+        np.fill_diagonal(table, LOCAL)
+        # dist[dst, ports[src, d]] for every router src and direction d
+        for direction, neighbours in enumerate(self.ports().T):
+            if direction == LOCAL:
+                continue
+            connected = neighbours >= 0
+            closer = np.zeros(dist.shape, dtype=bool)
+            closer[:, connected] = (dist[:, neighbours[connected]]
+                                    == dist[:, connected] - 1)
+            table[(table == -1) & closer] = direction
+        return table
+
+    def write_routing(self, routing_table_file, direction_matrix_file):
+        """
+        Write the routing table and the direction matrix of the routing
+        table mode (routing 'Table' and <routingTable> in config.xml).
+
+        Parameters:
+            - routing_table_file: the path of RT.txt.
+            - direction_matrix_file: the path of Direction_Mat.txt.
+
+        Return:
+            - None.
+        """
+        np.savetxt(routing_table_file, self.routing_table(), fmt='%d')
+        np.savetxt(direction_matrix_file, self.direction_matrix(), fmt='%d')
+
+    def without_links(self, indices):
+        """ Return a copy of the topology without the given links """
+        keep = np.ones(len(self.links), dtype=bool)
+        keep[indices] = False
+        return Topology(self.positions, self.layers, self.links[keep],
+                        self.directions[keep])
+
+    def with_faults(self, count, seed=None):
+        """
+        Return a copy of the topology in which count random links have
+        failed, as genFaultyMesh.bash did.
+        """
+        rng = np.random.default_rng(seed)
+        return self.without_links(rng.choice(len(self.links), count,
+                                             replace=False))
+###############################################################################
+
+
+def grid(x, y, z=1):
+    """
+    Place x * y * z routers on a grid, ordered by layer, row and column like
+    xml_writers.NetworkWriter does.
+
+    Return:
+        - A tuple of the (z, y, x) array of the router ids, their positions
+        and their layers.
+    """
+    ids = np.arange(x * y * z).reshape(z, y, x)
+    zi, yi, xi = np.indices((z, y, x)).reshape(3, -1)
+    positions = np.column_stack([xi / max(x - 1, 1), yi / max(y - 1, 1),
+                                 zi / max(z - 1, 1)])
+    return ids, positions, zi
+###############################################################################
+
+
+def connect(src, dst, direction):
+    """ Return the links and the directions between two id arrays """
+    links = np.column_stack([src.ravel(), dst.ravel()])
+    return links, np.full(len(links), direction)
+###############################################################################
+
+
+def build(positions, layers, parts):
+    """ Build a topology from a list of (links, directions) tuples """
+    links = np.concatenate([p[0] for p in parts]).reshape(-1, 2)
+    directions = np.concatenate([p[1] for p in parts])
+    return Topology(positions, layers, links, directions)
+###############################################################################
+
+
+def mesh_links(ids):
+    """ Return the x and y links of each layer of a grid """
+    return [connect(ids[:, :, :-1], ids[:, :, 1:], EAST),
+            connect(ids[:, :-1, :], ids[:, 1:, :], NORTH)]
+###############################################################################
+
+
+def mesh(x, y, z=1):
+    """ A mesh of z layers of x * y routers with all vertical links """
+    ids, positions, layers = grid(x, y, z)
+    return build(positions, layers,
+                 mesh_links(ids) + [connect(ids[:-1], ids[1:], UP)])
+###############################################################################
+
+
+def torus(x, y, z=1):
+    """
+    A mesh whose rows and columns are closed to rings. The wrap-around
+    links leave the last router of a row to the East and of a column to
+    the North.
+    """
+    ids, positions, layers = grid(x, y, z)
+    parts = mesh_links(ids) + [connect(ids[:-1], ids[1:], UP)]
+    # with two routers the wrap-around link would double the mesh link
+    if x > 2:
+        parts.append(connect(ids[:, :, -1], ids[:, :, 0], EAST))
+    if y > 2:
+        parts.append(connect(ids[:, -1, :], ids[:, 0, :], NORTH))
+    return build(positions, layers, parts)
+###############################################################################
+
+
+def ring(n):
+    """ A ring of n routers, a torus of one row """
+    return torus(n, 1)
+###############################################################################
+
+
+def tsv_placement(x, y, strategy, count=None, stride=2, seed=None):
+    """
+    Choose the positions of a layer which have a vertical link (TSV).
+
+    Parameters:
+        - x, y: the size of the layer.
+        - strategy: one of TSV_PLACEMENTS. 'full' places a TSV at every
+        router, 'corners' at the four corners, 'center' at the central
+        router(s), 'checkerboard' at every other router, 'stride' at every
+        stride-th router of every stride-th row, and 'random' at count
+        random routers.
+        - count: the number of TSVs of the 'random' strategy.
+        - stride: the distance between the TSVs of the 'stride' strategy.
+        - seed: the seed of the 'random' strategy.
+
+    Return:
+        - A boolean (y, x) array, True where a TSV is placed.
+    """
+    yi, xi = np.indices((y, x))
+    if strategy == 'full':
+        return np.ones((y, x), dtype=bool)
+    if strategy == 'corners':
+        return (xi % max(x - 1, 1) == 0) & (yi % max(y - 1, 1) == 0)
+    if strategy == 'center':
+        return (abs(2 * xi - (x - 1)) <= 1) & (abs(2 * yi - (y - 1)) <= 1)
+    if strategy == 'checkerboard':
+        return (xi + yi) % 2 == 0
+    if strategy == 'stride':
+        return (xi % stride == 0) & (yi % stride == 0)
+    if strategy == 'random':
+        rng = np.random.default_rng(seed)
+        tsvs = np.zeros(x * y, dtype=bool)
+        tsvs[rng.choice(x * y, count, replace=False)] = True
+        return tsvs.reshape(y, x)
+    raise ValueError('unknown TSV placement ' + str(strategy))
+###############################################################################
+
+
+def sparse_tsv(x, y, z, tsvs):
+    """
+    A stack of z meshes of x * y routers, with vertical links only at the
+    positions where tsvs is True. Like the torus, it needs table routing,
+    since XYZ routing expects a vertical link at every router.
+
+    Parameters:
+        - x, y, z: the size of the stack.
+        - tsvs: a boolean (y, x) array, see tsv_placement.
+    """
+    ids, positions, layers = grid(x, y, z)
+    up = connect(ids[:-1][:, tsvs], ids[1:][:, tsvs], UP)
+    return build(positions, layers, mesh_links(ids) + [up])
+###############################################################################
+
+
+def from_config(config):
+    """
+    Build the topology of the Hardware section of config.ini.
+
+    Parameters:
+        - config: the configure.Configuration. Its topology is 'mesh',
+        'torus', 'ring' (of x[0] routers) or 'sparse_tsv', the layers must
+        all have the size x[0] * y[0].
+
+    Return:
+        - The topology.
+    """
+    x, y, z = config.x[0], config.y[0], config.z
+    if config.topology != 'ring' and \
+            (set(config.x) != {x} or set(config.y) != {y}):
+        raise ValueError('the topology ' + config.topology +
+                         ' needs layers of equal size')
+    if config.topology == 'mesh':
+        return mesh(x, y, z)
+    if config.topology == 'torus':
+        return torus(x, y, z)
+    if config.topology == 'ring':
+        return ring(x)
+    if config.topology == 'sparse_tsv':
+        return sparse_tsv(x, y, z, tsv_placement(
+                x, y, config.tsvPlacement, config.tsvCount,
+                config.tsvStride, config.tsvSeed))
+    raise ValueError('unknown topology ' + config.topology)
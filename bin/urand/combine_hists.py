@@ -22,162 +22,282 @@
 ###############################################################################
 import os
 import sys
+import functools
+import xml.etree.ElementTree as ET
 import pandas as pd
 import numpy as np
 ###############################################################################
+# The directions in the order of the DIR enum of the simulator.
+DIRECTIONS = ['Local', 'East', 'West', 'North', 'South', 'Up', 'Down']
+# The directions of the buffer histograms, in the order they are plotted.
+BUFF_DIRECTIONS = ['Up', 'Down', 'North', 'South', 'East', 'West']
+###############################################################################
 
 
-def combine_VC_hists(directory):
+@functools.lru_cache(maxsize=None)
+def read_router_layers(network_file):
     """
-    Combine the VC histograms from csv files.
+    Read the layer of each router from the topology file.
 
     Parameters:
-        - directory: the path of the directory that contains the files.
+        - network_file: the path of the network.xml file.
 
     Return:
-        - A dataframe object of the combined csv files,
-        or None if the directory doesn't exist.
+        - A numpy array which holds the layer of router i at index i.
     """
-    if os.path.exists(directory):
-        layer0 = pd.DataFrame()
-        layer1 = pd.DataFrame()
-        layer2 = pd.DataFrame()
-        for filename in os.listdir(directory):
-            router_id = int(filename.split('.')[0])
-            if router_id in range(0, 16):
-                temp = pd.read_csv(directory + '/' + filename, header=None,
-                                   index_col=0).T
-                layer0 = layer0.add(temp, fill_value=0)
-            if router_id in range(16, 32):
-                temp = pd.read_csv(directory + '/' + filename, header=None,
-                                   index_col=0).T
-                layer1 = layer1.add(temp, fill_value=0)
-            if router_id in range(32, 48):
-                temp = pd.read_csv(directory + '/' + filename, header=None,
-                                   index_col=0).T
-                layer2 = layer2.add(temp, fill_value=0)
-
-        data = [layer0, layer1, layer2]
-        for df in data:
-            df.columns.name = 'Direction'
-            df.index.name = 'Number of VCs'
-
-        return data
-    else:
-        return None
+    root = ET.parse(network_file).getroot()
+    router_types = set()
+    for nodeType in root.find('nodeTypes').iter('nodeType'):
+        if nodeType.find('model').get('value') != 'ProcessingElement':
+            router_types.add(nodeType.get('id'))
+
+    layers = {}
+    for node in root.find('nodes').iter('node'):
+        if node.find('nodeType').get('value') in router_types:
+            layers[int(node.get('id'))] = int(node.find('layer').get('value'))
+
+    router_layers = np.zeros(max(layers) + 1, dtype=int)
+    for router_id, layer in layers.items():
+        router_layers[router_id] = layer
+    return router_layers
 ###############################################################################
 
 
-def read_dataframe(layers, path, layer, dir):
+def layer_names(num_layers):
     """
-    Read a data frame from csv file then accumulate the data.
+    Get the names of the layers, from the bottom to the top layer.
 
     Parameters:
-        - layers: a dictionary of dictionaries, and this is the data that
-        needs to bee updated.
-        - path: the path of the csv file to be read.
-        - layer: the key of outmost dictionary layers.
-        - dir: the key of innermost dictionary layers[layer]
+        - num_layers: the number of layers.
 
     Return:
-       - The updated data structure layers.
+        - A list of names, e.g. ['Bottom', 'Middle', 'Top'] for 3 layers.
     """
-    temp = pd.read_csv(path, index_col=0)
-    if not temp.empty:
-        layers[layer][dir] = layers[layer][dir].add(temp, fill_value=0)
-        return layers
+    if num_layers == 1:
+        return ['Bottom']
+    if num_layers == 3:
+        return ['Bottom', 'Middle', 'Top']
+    middle = ['Middle' + str(i) for i in range(1, num_layers - 1)]
+    return ['Bottom'] + middle + ['Top']
+###############################################################################
+
+
+def layer_matrix(router_layers, present):
+    """
+    Build the matrix which sums the reported routers of each layer.
+
+    Parameters:
+        - router_layers: the layer of each router.
+        - present: a boolean array, True for routers that have a histogram,
+        or True to sum all routers.
+
+    Return:
+        - A (layer x router) matrix of zeros and ones.
+    """
+    num_layers = router_layers.max() + 1
+    matrix = np.zeros((num_layers, len(router_layers)), dtype=np.int64)
+    matrix[router_layers, np.arange(len(router_layers))] = 1
+    return matrix * present
+###############################################################################
+
+
+def read_lines(path, skip=0):
+    """ Read the lines of a csv file without the first skip lines """
+    with open(path) as f:
+        return f.read().splitlines()[skip:]
+###############################################################################
+
+
+def load_VC_tensor(directory, num_routers):
+    """
+    Load all VC histograms of a run into one array.
+
+    Parameters:
+        - directory: the path of the VCUsage directory.
+        - num_routers: the number of routers in the network.
+
+    Return:
+        - A (router x direction x number of VCs) array, a boolean array of
+        the routers that have a histogram and the names of the directions.
+    """
+    router_ids = []
+    lines = []
+    for filename in os.listdir(directory):
+        router_id = int(filename.split('.')[0])
+        if router_id < num_routers:
+            router_ids.append(router_id)
+            lines += read_lines(directory + '/' + filename)
+    present = np.zeros(num_routers, dtype=bool)
+    if not router_ids:
+        return None, present, []
+
+    names = [line.split(',', 1)[0] for line in lines[:len(DIRECTIONS)]]
+    num_values = lines[0].count(',')
+    # parse the histograms of all routers at once
+    values = np.loadtxt(lines, delimiter=',', ndmin=2,
+                        usecols=range(1, num_values + 1), dtype=np.int64)
+    tensor = np.zeros((num_routers, len(DIRECTIONS), num_values),
+                      dtype=np.int64)
+    tensor[router_ids] = values.reshape(len(router_ids), len(DIRECTIONS),
+                                        num_values)
+    present[router_ids] = True
+    return tensor, present, names
+###############################################################################
+
+
+def load_Buff_tensor(directory, num_routers):
+    """
+    Load all buffer histograms of a run into one array.
+
+    Parameters:
+        - directory: the path of the BuffUsage directory.
+        - num_routers: the number of routers in the network.
+
+    Return:
+        - A (router x direction x VC x buffer) array and a boolean
+        (router x direction) array of the existing histograms.
+    """
+    keys = []
+    lines = []
+    for filename in os.listdir(directory):
+        router_id, direction = filename.split('.')[0].split('_')
+        router_id = int(router_id)
+        if router_id < num_routers and direction in DIRECTIONS:
+            keys.append((router_id, DIRECTIONS.index(direction)))
+            lines += read_lines(directory + '/' + filename, skip=1)
+    present = np.zeros((num_routers, len(DIRECTIONS)), dtype=bool)
+    if not keys:
+        return None, present
+
+    num_vcs = lines[0].count(',')
+    values = np.loadtxt(lines, delimiter=',', ndmin=2,
+                        usecols=range(1, num_vcs + 1), dtype=np.int64)
+    num_buffers = len(values) // len(keys)
+    routers, dirs = np.array(keys).T
+    tensor = np.zeros((num_routers, len(DIRECTIONS), num_vcs, num_buffers),
+                      dtype=np.int64)
+    # a file holds a (buffer x VC) matrix
+    tensor[routers, dirs] = values.reshape(len(keys), num_buffers,
+                                           num_vcs).transpose(0, 2, 1)
+    present[routers, dirs] = True
+    return tensor, present
 ###############################################################################
 
 
-def init_data_structure():
+def combine_VC_hists(directory, network_file):
+    """
+    Combine the VC histograms from csv files.
+
+    Parameters:
+        - directory: the path of the directory that contains the files.
+        - network_file: the path of the network.xml file of the run.
+
+    Return:
+        - A list of dataframes, the summed histograms of each layer,
+        or None if the directory doesn't exist.
+    """
+    if not os.path.exists(directory):
+        return None
+    router_layers = read_router_layers(network_file)
+    tensor, present, names = load_VC_tensor(directory, len(router_layers))
+    matrix = layer_matrix(router_layers, present)
+    data = []
+    for layer in range(len(matrix)):
+        if not matrix[layer].any():
+            data.append(pd.DataFrame())
+            continue
+        layer_sum = np.tensordot(matrix[layer], tensor, axes=1)
+        df = pd.DataFrame(layer_sum.T, columns=names,
+                          index=np.arange(1, layer_sum.shape[1] + 1))
+        # sorted by name like the DataFrame.add sums of earlier versions
+        df = df.sort_index(axis=1)
+        df.columns.name = 'Direction'
+        df.index.name = 'Number of VCs'
+        data.append(df)
+    return data
+###############################################################################
+
+
+def init_data_structure(num_layers=3):
     """
     Initialize the data structure named 'layers' which is a dictionary of
     dictionaries.
 
     Parameters:
-        - None
+        - num_layers: the number of layers.
 
     Return:
         - The initilazed data structure
     """
-    layer_temp = {'Up': pd.DataFrame(), 'Down': pd.DataFrame(),
-                  'North': pd.DataFrame(), 'South': pd.DataFrame(),
-                  'East': pd.DataFrame(), 'West': pd.DataFrame()}
-    layers = {'Bottom': layer_temp, 'Middle': layer_temp.copy(),
-              'Top': layer_temp.copy()}
+    names = layer_names(num_layers)
+    layers = {}
+    for name in names:
+        layers[name] = {d: pd.DataFrame() for d in BUFF_DIRECTIONS}
+    del layers[names[0]]['Down']  # bottom layer has no down direction
+    if num_layers > 1:
+        del layers[names[-1]]['Up']  # top layer has no up direction
+    return layers
+###############################################################################
 
-    del layers['Bottom']['Down']  # bottom layer has no down direction
-    del layers['Top']['Up']  # top layer has no up direction
 
-    return layers
+def add_Buff_hists(total, run):
+    """
+    Accumulate the buffer histograms of a run.
+
+    Parameters:
+        - total: the accumulated data structure, may be empty.
+        - run: the data structure of a run, see combine_Buff_hists.
+
+    Return:
+        - The updated data structure total.
+    """
+    for l in run:
+        total.setdefault(l, {})
+        for d in run[l]:
+            total[l][d] = total[l].get(d, pd.DataFrame()).add(run[l][d],
+                                                              fill_value=0)
+    return total
 ###############################################################################
 
 
-def combine_Buff_hists(directory):
+def combine_Buff_hists(directory, network_file):
     """
         Combine the Buffer histograms from csv files.
 
         Parameters:
             - directory: the path of the directory that contains the files.
+            - network_file: the path of the network.xml file of the run.
 
         Return:
-            - A dataframe object of the combined csv files,
-            or None if the directory doesn't exist.
-    """
-    if os.path.exists(directory):
-        layers = init_data_structure()
-
-        for filename in os.listdir(directory):
-            router_id = int(filename.split('.')[0].split('_')[0])
-            direction = filename.split('.')[0].split('_')[1]
-            path = directory + '/' + filename
-            if router_id in range(0, 16):
-                layer = 'Bottom'
-                if direction == 'Up':
-                    layers = read_dataframe(layers, path, layer, 'Up')
-                if direction == 'North':
-                    layers = read_dataframe(layers, path, layer, 'North')
-                if direction == 'South':
-                    layers = read_dataframe(layers, path, layer, 'South')
-                if direction == 'East':
-                    layers = read_dataframe(layers, path, layer, 'East')
-                if direction == 'West':
-                    layers = read_dataframe(layers, path, layer, 'West')
-            if router_id in range(16, 32):
-                layer = 'Middle'
-                if direction == 'Up':
-                    layers = read_dataframe(layers, path, layer, 'Up')
-                if direction == 'Down':
-                    layers = read_dataframe(layers, path, layer, 'Down')
-                if direction == 'North':
-                    layers = read_dataframe(layers, path, layer, 'North')
-                if direction == 'South':
-                    layers = read_dataframe(layers, path, layer, 'South')
-                if direction == 'East':
-                    layers = read_dataframe(layers, path, layer, 'East')
-                if direction == 'West':
-                    layers = read_dataframe(layers, path, layer, 'West')
-            if router_id in range(32, 48):
-                layer = 'Top'
-                if direction == 'Down':
-                    layers = read_dataframe(layers, path, layer, 'Down')
-                if direction == 'North':
-                    layers = read_dataframe(layers, path, layer, 'North')
-                if direction == 'South':
-                    layers = read_dataframe(layers, path, layer, 'South')
-                if direction == 'East':
-                    layers = read_dataframe(layers, path, layer, 'East')
-                if direction == 'West':
-                    layers = read_dataframe(layers, path, layer, 'West')
-
-        # average the buffer usage over the inner routers (#4)
-        for l in layers:
-            for d in layers[l]:
-                layers[l][d] = np.ceil(layers[l][d] / 4)
-
-        return layers
-    else:
+            - A dictionary of layers of dictionaries of directions, holding
+            the histograms averaged over the reported routers, or None if the
+            directory doesn't exist.
+    """
+    if not os.path.exists(directory):
         return None
+    router_layers = read_router_layers(network_file)
+    num_layers = router_layers.max() + 1
+    layers = init_data_structure(num_layers)
+    tensor, present = load_Buff_tensor(directory, len(router_layers))
+    if tensor is None:
+        return layers
+
+    # sum per layer and direction, then average over the reported routers
+    matrix = layer_matrix(router_layers, True)
+    counts = matrix @ present
+    sums = np.tensordot(matrix, tensor, axes=1)
+    for layer, name in enumerate(layer_names(num_layers)):
+        for d in layers[name]:
+            dir_ix = DIRECTIONS.index(d)
+            if counts[layer, dir_ix] == 0:
+                continue
+            hist = np.ceil(sums[layer, dir_ix] / counts[layer, dir_ix])
+            df = pd.DataFrame(hist.T, columns=[str(vc) for vc in
+                                               range(hist.shape[0])],
+                              index=np.arange(1, hist.shape[1] + 1))
+            df.index.name = 'Buffer\\VC'
+            layers[name][d] = df
+    return layers
 ###############################################################################
 
 
@@ -186,8 +306,9 @@ if __name__ == '__main__':
     try:
         VC_dir = sys.argv[1]
         Buff_dir = sys.argv[2]
+        network_file = sys.argv[3]
     except Exception:
-        print('Please enter the directory path.')
+        print('Please enter the directory paths and the network file.')
     else:
-        combine_VC_hists(VC_dir)
-        combine_Buff_hists(Buff_dir)
+        combine_VC_hists(VC_dir, network_file)
+        combine_Buff_hists(Buff_dir, network_file)
@@ -28,6 +28,11 @@ plt.rcParams.update({'figure.max_open_warning': 0})
 from PyPDF2 import PdfFileMerger
 import glob as glob
 import os
+import sys
+import argparse
+import warnings
+sys.path.insert(0, '..')
+import results_store
 ###############################################################################
 
 
@@ -41,17 +46,22 @@ def plot_latencies(results):
     Return:
         - None.
     """
-    latenciesFlit = results['latenciesFlit']
-    latenciesNetwork = results['latenciesNetwork']
-    latenciesPacket = results['latenciesPacket']
+    latenciesFlit = results_store.valid_latencies(results, 'latenciesFlit')
+    latenciesNetwork = results_store.valid_latencies(results,
+                                                     'latenciesNetwork')
+    latenciesPacket = results_store.valid_latencies(results, 'latenciesPacket')
     injectionRates = results['injectionRates']
-
-    meanLatenciesFlit = np.mean(latenciesFlit, axis=1)
-    meanLatenciesPacket = np.mean(latenciesPacket, axis=1)
-    meanLatenciesNetwork = np.mean(latenciesNetwork, axis=1)
-    stdLatenciesFlit = np.std(latenciesFlit, axis=1)
-    stdLatenciesPacket = np.std(latenciesPacket, axis=1)
-    stdLatenciesNetwork = np.std(latenciesNetwork, axis=1)
+    saturated = results_store.saturated_rates(results)
+
+    # rates at which all runs saturated have no mean
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        meanLatenciesFlit = np.nanmean(latenciesFlit, axis=1)
+        meanLatenciesPacket = np.nanmean(latenciesPacket, axis=1)
+        meanLatenciesNetwork = np.nanmean(latenciesNetwork, axis=1)
+        stdLatenciesFlit = np.nanstd(latenciesFlit, axis=1)
+        stdLatenciesPacket = np.nanstd(latenciesPacket, axis=1)
+        stdLatenciesNetwork = np.nanstd(latenciesNetwork, axis=1)
 
     fig = plt.figure()
     plt.ylabel('Latencies in ns', fontsize=11)
@@ -67,7 +77,16 @@ def plot_latencies(results):
     plt.errorbar(injectionRates, meanLatenciesPacket, yerr=stdLatenciesPacket,
                  color='g', **linestyle, marker='^')
 
-    plt.legend(['Flit', 'Network', 'Packet'])
+    # the rates at which runs saturated are marked by dotted lines
+    handles = list(plt.gca().containers)
+    legend = ['Flit', 'Network', 'Packet']
+    lines = [plt.axvline(rate, color='0.5', linestyle=':', linewidth=1)
+             for rate in np.asarray(injectionRates)[saturated]]
+    if lines:
+        handles.append(lines[0])
+        legend.append('Saturated')
+
+    plt.legend(handles, legend)
     fig.suptitle('Latencies', fontsize=16)
     # plt.show()
     fig.savefig('latencies.pdf')
@@ -166,6 +185,26 @@ def read_raw_results(results_file):
 ###############################################################################
 
 
+def read_results(store, results_file, experiment=None):
+    """
+    Read the results from the results store, or from the pickle file of
+    sweeps that predate the store.
+
+    Parameters:
+        - store: the root directory of the results store.
+        - results_file: the path to the pickle file.
+        - experiment: the name of the experiment, by default the one saved
+        last.
+
+    Return:
+        - results: a dictionary of objects.
+    """
+    if os.path.isdir(store):
+        return results_store.load_results(store, experiment)
+    return read_raw_results(results_file)
+###############################################################################
+
+
 def merge_pdfs(output_path):
     """Merge the generated reports in one pdf."""
     try:
@@ -190,7 +229,13 @@ def merge_pdfs(output_path):
 
 def main():
     """Main Point of Execution."""
-    results = read_raw_results('rawResults.pkl')
+    parser = argparse.ArgumentParser(
+            description='Plot the results of a uniform random sweep')
+    parser.add_argument('--experiment',
+                        help='the sweep in the results store, by default '
+                        'the one saved last')
+    args = parser.parse_args()
+    results = read_results('results', 'rawResults.pkl', args.experiment)
 
     plot_latencies(results)
 
@@ -21,55 +21,97 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 ###############################################################################
 import os
+import time
+import errno
+import argparse
 import shutil
+import tempfile
+import functools
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import xml.etree.ElementTree as ET
 import csv
 import numpy as np
-from joblib import Parallel, delayed
-import pickle
-import pandas as pd
 from combine_hists import combine_VC_hists, combine_Buff_hists,\
-init_data_structure
+add_Buff_hists
 import sys
 sys.path.insert(0, '..')
 from configure import Configuration
+from sweep_scheduler import SweepScheduler
+from result_cache import ResultCache
+from adaptive_sweep import AdaptiveRateSweep
+from restart_sampling import is_converged
+from saturation_monitor import wait_or_kill, PROGRESS_FILE
+from remote_workers import WorkerPool
+from running_stats import RunningStats
+from config_template import ConfigTemplate, field, routing_table_nodes
+from run_seeds import run_seed
+from power_stage import PowerModel, POWER_KEYS
+import results_store
 ###############################################################################
 
 
 def main():
     """ Run the script """
+    parser = argparse.ArgumentParser(
+            description='Run the uniform random sweep')
+    parser.add_argument('--experiment',
+                        help='the name of the sweep in the results store, '
+                        'by default the experiment option of config.ini')
+    args = parser.parse_args()
     os.system('cp ../config.xml config/config.xml')
     os.system('cp ../network.xml config/network.xml')
     os.system('cp ../../simulator/sim .')
     config = Configuration('../config.ini')
+    if config.routing == 'Table':
+        # configure.py writes the tables next to config.xml
+        os.system('cp ../RT.txt config/RT.txt')
+        os.system('cp ../Direction_Mat.txt config/Direction_Mat.txt')
     results = begin_all_sims(config)
-    save_results(results, 'rawResults.pkl')
+    experiment = args.experiment or config.experiment or \
+        os.path.basename(os.getcwd()) + time.strftime('-%Y%m%d-%H%M%S')
+    save_results(results, 'results', experiment)
+    print('Saved the results as experiment ' + experiment)
 ###############################################################################
 
 
-def write_config_file(config, configFileSrc, configFileDst, injectionRate):
+def make_config_template(config, configFileSrc):
     """
-    Write the configuration file for the urand simulation.
+    Parse the configuration file once and fill in everything but the fields
+    which differ between the runs of the sweep.
 
     Parameters:
         - config: configuration object.
         - configFileSrc: the source of the configuration file.
-        - configFileDst: the destination of the config file.
-        - injectionRate: the injection rate.
 
     Return:
-        - None.
+        - The ConfigTemplate of the runs, with the fields injectionRate,
+        seed and nocFile.
     """
     try:
         configTree = ET.parse(configFileSrc)
     except Exception:
         raise
 
-    configTree.find('noc/nocFile').text = 'config/' + config.topologyFile + '.xml'
+    configTree.find('noc/nocFile').text = field('nocFile')
+    # Runs in a private output directory or on workers do not find the
+    # routing tables relative to their working directory.
+    if config.sharedWorkspace or config.workers:
+        for node in routing_table_nodes(configTree):
+            node.set('value', os.path.join(config.basedir, node.get('value')))
     configTree.find('general/simulationTime').set('value', str(config.simulationTime))
+    if config.saturationBacklog > 0:
+        progress = configTree.find('general/progressInterval')
+        if progress is None:
+            progress = ET.SubElement(configTree.find('general'),
+                                     'progressInterval')
+        progress.set('value', str(config.progressInterval))
     configTree.find('general/outputToFile').set('value', 'true')
     configTree.find('general/outputToFile').text = 'report'
+    seed = configTree.find('general/seed')
+    if seed is None:
+        seed = ET.SubElement(configTree.find('general'), 'seed')
+    seed.set('value', field('seed'))
 
     for elem in list(configTree.find('application/synthetic').iter()):
         if elem.get('name') == 'warmup':
@@ -79,18 +121,42 @@ def write_config_file(config, configFileSrc, configFileDst, injectionRate):
                      str(config.warmupStart + config.warmupDuration))
             elem.find('duration').set('max',
                      str(config.warmupStart + config.warmupDuration))
-            elem.find('injectionRate').set('value', str(injectionRate))
+            elem.find('injectionRate').set('value', field('injectionRate'))
         if elem.get('name') == 'run':
             elem.find('start').set('min', str(config.runStart))
             elem.find('start').set('max', str(config.runStart))
             elem.find('duration').set('min', str(config.runStart + config.runDuration))
             elem.find('duration').set('max', str(config.runStart + config.runDuration))
-            elem.find('injectionRate').set('value', str(injectionRate))
-    configTree.write(configFileDst)
+            elem.find('injectionRate').set('value', field('injectionRate'))
+    return ConfigTemplate(configTree)
 ###############################################################################
 
 
-def write_sim_files(config, simdir):
+def write_config_file(config, template, configFileDst, injectionRate, seed,
+                      nocFile=None):
+    """
+    Write the configuration file for the urand simulation.
+
+    Parameters:
+        - config: configuration object.
+        - template: the ConfigTemplate of make_config_template.
+        - configFileDst: the destination of the config file.
+        - injectionRate: the injection rate.
+        - seed: the seed of the run.
+        - nocFile: the path of the topology file as seen by the simulator,
+        by default the copy in the config folder of the simulation.
+
+    Return:
+        - None.
+    """
+    if nocFile is None:
+        nocFile = 'config/' + config.topologyFile + '.xml'
+    template.write(configFileDst, injectionRate=injectionRate, seed=seed,
+                   nocFile=nocFile)
+###############################################################################
+
+
+def write_sim_files(config, simdir, files=()):
     """
     Write the files that are associated with each run of the simulation
     (the executable sim + the configuration file).
@@ -98,6 +164,8 @@ def write_sim_files(config, simdir):
     Parameters:
         - config: configuration object.
         - simdir: the path of the simulation directory.
+        - files: further files of the run, e.g. the routing tables. Relative
+        paths are copied to the same path below simdir.
 
     Return:
         - None.
@@ -114,32 +182,45 @@ def write_sim_files(config, simdir):
 
     shutil.copy('sim', simdir)
     shutil.copy(config.libDir + '/' + config.topologyFile + '.xml', confdir)
+    for path in files:
+        if not os.path.isabs(path):
+            dst = os.path.join(simdir, path)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy(path, dst)
 ###############################################################################
 
 
-def run_indivisual_sim(simdir, basedir):
+def run_indivisual_sim(simdir, basedir, args=('./sim'), maxBacklog=0,
+                       startTime=0):
     """
     Run an individual simulation.
 
     Parameters:
         - simdir: the path to the simulatin directory.
         - basedir: the path to root of all simulations.
+        - args: the command line of the simulator.
+        - maxBacklog: if greater than 0, the simulation is killed once its
+        undelivered packets per processing element exceed maxBacklog.
+        - startTime: the time in ns from which on the backlog is checked.
 
     Return:
-        - None.
+        - True if the simulation has been killed as saturated.
     """
-    os.chdir(simdir)
-    args = ('./sim')
-    outfile = open('log', 'w')
-
-    try:
-        subprocess.run(args, stdout=outfile, check=True)
-    except subprocess.CalledProcessError:
-        pass
+    outfile = open(simdir + '/log', 'w')
+
+    process = subprocess.Popen(args, stdout=outfile,
+                               cwd=os.path.join(basedir, simdir))
+    if maxBacklog > 0:
+        saturated = wait_or_kill(
+                process, os.path.join(basedir, simdir, PROGRESS_FILE),
+                maxBacklog, startTime)
+    else:
+        process.wait()
+        saturated = False
 
     outfile.flush()
     outfile.close()
-    os.chdir(basedir)
+    return saturated
 ###############################################################################
 
 
@@ -169,27 +250,138 @@ def get_latencies(latencies_results_file):
 ###############################################################################
 
 
-def begin_individual_sim(config, restart, injectionRates, injIter):
+def collect_run_results(simdir, network_file, power=None):
+    """
+    Read the results of an individual simulation.
+
+    Parameters:
+        - simdir: the path of the simulation directory.
+        - network_file: the path of the topology file of the run.
+        - power: an optional PowerModel, which estimates the power of the
+        run from its reports.
+
+    Return:
+        - A dictionary of the latencies, the combined VC and buffer usage
+        histograms and the power of the run.
+    """
+    return {'saturated': False,
+            'latencies': get_latencies(simdir + '/report_Performance.csv'),
+            'VCUsage': combine_VC_hists(simdir + '/VCUsage', network_file),
+            'BuffUsage': combine_Buff_hists(simdir + '/BuffUsage', network_file),
+            'power': power.run_power(simdir) if power is not None else None}
+###############################################################################
+
+
+def saturated_run():
+    """ Return the results of a run which saturated or has been skipped """
+    return {'latencies': [-1, -1, -1], 'VCUsage': None, 'BuffUsage': None,
+            'power': None, 'saturated': True}
+###############################################################################
+
+
+def begin_individual_sim(config, template, restart, injectionRates, injIter,
+                         simId, workers=None, power=None):
     """
     Begin a simulation with a specif injection rate.
 
     Parameters:
         - config: configuration object.
+        - template: the ConfigTemplate of the sweep.
         - restart: the index of restarts.
         - injectioRates: the list of injection rates.
         - injIter: the index of the injection rate to be run.
+        - simId: the unique index of the simulation within the sweep.
+        - workers: an optional WorkerPool which runs the simulator instead
+        of this host.
+        - power: an optional PowerModel, see collect_run_results.
 
     Return:
-        - None.
+        - The results of the run, see collect_run_results.
     """
     print('Simulation with injection rate: ' + str(injectionRates[injIter])
             + ' restart ' + str(restart))
-    currentSimDir = config.simDir + str(restart)
-    currentConfDir = currentSimDir + '/config'
-    write_sim_files(config, currentSimDir)
-    write_config_file(config, 'config/config.xml', currentConfDir + '/config.xml',
-                      injectionRates[injIter])
-    run_indivisual_sim(currentSimDir, config.basedir)
+    seed = run_seed(config.seedBase, injectionRates[injIter], restart)
+    if config.sharedWorkspace or workers is not None:
+        # Only a private output directory per run, the simulator and the
+        # topology are shared read-only by all runs (or run remotely).
+        currentSimDir = os.path.abspath(tempfile.mkdtemp(
+                prefix=config.simDir + str(simId) + '_',
+                dir=config.outputDir or config.basedir))
+        configFile = currentSimDir + '/config.xml'
+        topologyFile = os.path.join(config.basedir, config.libDir,
+                                    config.topologyFile + '.xml')
+        write_config_file(config, template, configFile,
+                          injectionRates[injIter], seed, topologyFile)
+        args = [os.path.join(config.basedir, 'sim'), configFile]
+    else:
+        currentSimDir = config.simDir + str(simId)
+        configFile = currentSimDir + '/config/config.xml'
+        topologyFile = currentSimDir + '/config/' + config.topologyFile + '.xml'
+        write_sim_files(config, currentSimDir, template.routing_tables)
+        write_config_file(config, template, configFile,
+                          injectionRates[injIter], seed)
+        args = ('./sim')
+    if workers is not None:
+        run_sim = functools.partial(workers.run, configFile, topologyFile,
+                                    currentSimDir,
+                                    files=template.routing_tables)
+    else:
+        run_sim = functools.partial(run_indivisual_sim, currentSimDir,
+                                    config.basedir, args)
+    saturated = False
+    if config.cacheDir:
+        cache = ResultCache(config.cacheDir, config.cacheSize * 1024 * 1024)
+        key = cache.make_key(configFile, topologyFile, 'sim', seed,
+                             template.routing_tables)
+        if not cache.fetch(key, currentSimDir):
+            saturated = run_sim(config.saturationBacklog, config.runStart)
+            cache.store(key, currentSimDir)
+    else:
+        saturated = run_sim(config.saturationBacklog, config.runStart)
+    if saturated:
+        print('Stopped saturated simulation with injection rate: '
+              + str(injectionRates[injIter]) + ' restart ' + str(restart))
+        shutil.rmtree(currentSimDir)
+        return saturated_run()
+    run = collect_run_results(currentSimDir, os.path.join(
+            config.basedir, config.libDir, config.topologyFile + '.xml'),
+            power)
+    shutil.rmtree(currentSimDir)
+    return run
+###############################################################################
+
+
+def submit_restarts(scheduler, config, template, injectionRates, injIter,
+                    first, count, saturatedAt, workers=None, power=None):
+    """
+    Submit a wave of restarts of an injection rate.
+
+    Restarts which already saturated at a lower rate are not run again, they
+    are recorded as saturated right away.
+
+    Parameters:
+        - scheduler: the SweepScheduler of the sweep.
+        - config: configuration object.
+        - template: the ConfigTemplate of the sweep.
+        - injectionRates: the list of injection rates.
+        - injIter: the index of the injection rate to be run.
+        - first: the index of the first restart of the wave.
+        - count: the number of restarts of the wave.
+        - saturatedAt: a dictionary of the lowest saturated rate per restart.
+        - workers: an optional WorkerPool, see begin_individual_sim.
+        - power: an optional PowerModel, see begin_individual_sim.
+
+    Return:
+        - None.
+    """
+    for restart in range(first, first + count):
+        if saturatedAt.get(restart, np.inf) < injectionRates[injIter]:
+            scheduler.complete((injIter, restart), saturated_run())
+            continue
+        simId = injIter * config.restarts + restart
+        scheduler.submit((injIter, restart), begin_individual_sim,
+                         config, template, restart, injectionRates, injIter,
+                         simId, workers, power)
 ###############################################################################
 
 
@@ -197,6 +389,9 @@ def begin_all_sims(config):
     """
     Begin all simulations.
 
+    All (injection rate, restart) pairs are submitted to one process pool and
+    the runs are combined as soon as they complete.
+
     Parameters:
         - config: configuration object.
 
@@ -207,88 +402,206 @@ def begin_all_sims(config):
     str(config.runRateMin) + ' to ' + str(config.runRateMax) + ' steps ' +
     str(config.runRateStep))
 
-    # Initialze the latencies.
-    if config.runRateMin == config.runRateMax:
+    # Initialze the injection rates, the adaptive sweep adds further rates
+    # around the saturation knee while the sweep runs.
+    sweep = None
+    if config.adaptiveSweep:
+        sweep = AdaptiveRateSweep(config.runRateMin, config.runRateMax,
+                                  config.runRateStep, config.kneeTolerance,
+                                  config.kneeFactor,
+                                  config.numCores // config.restarts)
+        injectionRates = sweep.initial_rates()
+    elif config.runRateMin == config.runRateMax:
         injectionRates = [config.runRateMin]
     else:
         injectionRates = np.arange(config.runRateMin, config.runRateMax, config.runRateStep)
     injectionRates = [round(elem, 4) for elem in injectionRates]
-    latenciesFlit = -np.ones((len(injectionRates), config.restarts))
-    latenciesPacket = -np.ones((len(injectionRates), config.restarts))
-    latenciesNetwork = -np.ones((len(injectionRates), config.restarts))
+    # Restarts which have not been run stay nan, failed runs are -1.
+    latenciesFlit = [np.full(config.restarts, np.nan) for inj in injectionRates]
+    latenciesPacket = [np.full(config.restarts, np.nan) for inj in injectionRates]
+    latenciesNetwork = [np.full(config.restarts, np.nan) for inj in injectionRates]
+    saturated = [np.zeros(config.restarts, dtype=bool) for inj in injectionRates]
+    saturatedAt = {}
+    powers = {key: [np.full(config.restarts, np.nan) for inj in injectionRates]
+              for key in POWER_KEYS}
+
+    VCUsage_inj = [[] for inj in injectionRates]
+    BuffUsage_inj = [{} for inj in injectionRates]
+    # Saturated and skipped runs have no buffer usage, so the histograms are
+    # averaged over the runs which have one.
+    BuffUsage_runs = [0 for inj in injectionRates]
+
+    # With a restart tolerance the restarts run in waves, and no further wave
+    # of a rate is launched once its confidence intervals are narrow enough.
+    wave = config.restarts
+    if config.restartTolerance > 0:
+        wave = min(config.restarts, max(2, config.restartWave))
+    launched = [wave for inj in injectionRates]
+    remaining = [wave for inj in injectionRates]
+
+    # The config of all runs is parsed once, the runs only fill in their
+    # fields.
+    template = make_config_template(config, 'config/config.xml')
+
+    # The power of each run is estimated from its reports before its
+    # directory is removed.
+    power = None
+    if config.powerProfile:
+        power = PowerModel(config.powerProfile, os.path.join(
+                config.basedir, config.libDir, config.topologyFile + '.xml'))
+
+    # Run the full simulation (for all injection rates and restarts).
+    # With remote workers the local threads only prepare and combine runs.
+    workers = None
+    executor = None
+    if config.workers:
+        workers = WorkerPool(config.workers,
+                             os.path.join(config.basedir, 'sim'))
+        executor = ThreadPoolExecutor(max_workers=len(workers))
+        print('Starting Sims on ' + str(len(workers)) + ' remote slots')
+    else:
+        print('Starting Sims with ' + str(config.numCores) + ' processes')
+    with SweepScheduler(config.numCores, executor) as scheduler:
+        for injIter in range(len(injectionRates)):
+            submit_restarts(scheduler, config, template, injectionRates,
+                            injIter, 0, wave, saturatedAt, workers, power)
+
+        for (injIter, restart), run in scheduler.results():
+            lat = run['latencies']
+            latenciesFlit[injIter][restart] = lat[0]
+            latenciesPacket[injIter][restart] = lat[1]
+            latenciesNetwork[injIter][restart] = lat[2]
+            if run['saturated']:
+                # Higher rates of this restart would saturate as well.
+                rate = injectionRates[injIter]
+                saturated[injIter][restart] = True
+                saturatedAt[restart] = min(rate, saturatedAt.get(restart, rate))
+                scheduler.cancel(lambda key: key[1] == restart and
+                                 injectionRates[key[0]] > rate, saturated_run())
+            if run['VCUsage'] is not None:
+                if not VCUsage_inj[injIter]:
+                    VCUsage_inj[injIter] = [RunningStats() for df in run['VCUsage']]
+                for stats, layer_df in zip(VCUsage_inj[injIter], run['VCUsage']):
+                    stats.add(layer_df)
+            if run['BuffUsage'] is not None:
+                add_Buff_hists(BuffUsage_inj[injIter], run['BuffUsage'])
+                BuffUsage_runs[injIter] += 1
+            if run['power'] is not None:
+                for key in POWER_KEYS:
+                    powers[key][injIter][restart] = run['power'][key]
+            remaining[injIter] -= 1
+
+            # Launch the next wave of the rate if it has not converged yet.
+            if remaining[injIter] == 0 and launched[injIter] < config.restarts \
+                    and not saturated[injIter].any():
+                lats = [latenciesFlit[injIter], latenciesPacket[injIter],
+                        latenciesNetwork[injIter]]
+                if not is_converged(lats, config.restartTolerance, config.restartConfidence):
+                    count = min(wave, config.restarts - launched[injIter])
+                    submit_restarts(scheduler, config, template,
+                                    injectionRates, injIter,
+                                    launched[injIter], count, saturatedAt,
+                                    workers, power)
+                    launched[injIter] += count
+                    remaining[injIter] = count
+
+            # Refine the knee once all runs of the last step are done.
+            if sweep is not None and not any(remaining):
+                # A rate at which any restart saturated is beyond the knee,
+                # whatever the latency of the other restarts.
+                meanLatencies = {}
+                for rate, lats, sat in zip(injectionRates, latenciesPacket,
+                                           saturated):
+                    valid = lats[lats >= 0]
+                    if len(valid) and not sat.any():
+                        meanLatencies[rate] = valid.mean()
+                    else:
+                        meanLatencies[rate] = np.nan
+                for rate in sweep.next_rates(meanLatencies):
+                    print('Refining the saturation knee at injection rate '
+                          + str(rate))
+                    injectionRates.append(rate)
+                    latenciesFlit.append(np.full(config.restarts, np.nan))
+                    latenciesPacket.append(np.full(config.restarts, np.nan))
+                    latenciesNetwork.append(np.full(config.restarts, np.nan))
+                    saturated.append(np.zeros(config.restarts, dtype=bool))
+                    for key in POWER_KEYS:
+                        powers[key].append(np.full(config.restarts, np.nan))
+                    VCUsage_inj.append([])
+                    BuffUsage_inj.append({})
+                    BuffUsage_runs.append(0)
+                    launched.append(wave)
+                    remaining.append(wave)
+                    submit_restarts(scheduler, config, template,
+                                    injectionRates, len(injectionRates) - 1,
+                                    0, wave,
+                                    saturatedAt, workers, power)
+
+    if workers is not None:
+        workers.close()
+
+    # Sort the results of all rates by injection rate.
+    order = np.argsort(injectionRates)
+    injectionRates = [injectionRates[i] for i in order]
+    latenciesFlit = np.array(latenciesFlit)[order]
+    latenciesPacket = np.array(latenciesPacket)[order]
+    latenciesNetwork = np.array(latenciesNetwork)[order]
+    saturated = np.array(saturated)[order]
+    powers = {key: np.array(values)[order] for key, values in powers.items()}
+    VCUsage_inj = [VCUsage_inj[i] for i in order]
+    BuffUsage_inj = [BuffUsage_inj[i] for i in order]
+    BuffUsage_runs = [BuffUsage_runs[i] for i in order]
+    seeds = np.array([[run_seed(config.seedBase, rate, restart)
+                       for restart in range(config.restarts)]
+                      for rate in injectionRates], dtype=np.int64)
 
-    # Run the full simulation (for all injection rates).
-    injIter = 0
     VCUsage = []
     BuffUsage = []
-    for inj in injectionRates:
-        print('Starting Sims with ' + str(config.numCores) + ' processes')
-        Parallel(n_jobs=config.numCores)(delayed(begin_individual_sim)
-        (config, restart, injectionRates, injIter) for restart in range(config.restarts))
-
-        VCUsage_inj = [pd.DataFrame() for i in range(3)]
-        BuffUsage_inj = init_data_structure()  # a dict of dicts
-        # Run the simulation several times for each injection rate.
-        for restart in range(config.restarts):
-            currentSimdir = 'sim' + str(restart)
-            lat = get_latencies(currentSimdir + '/report_Performance.csv')
-            latenciesFlit[injIter, restart] = lat[0]
-            latenciesPacket[injIter, restart] = lat[1]
-            latenciesNetwork[injIter, restart] = lat[2]
-            VCUsage_run = combine_VC_hists(currentSimdir + '/VCUsage')
-            if VCUsage_run is not None:
-                for ix, layer_df in enumerate(VCUsage_run):
-                    VCUsage_inj[ix] = pd.concat([VCUsage_inj[ix], layer_df])
-            BuffUsage_run = combine_Buff_hists(currentSimdir + '/BuffUsage')
-            if BuffUsage_run is not None:
-                for l in BuffUsage_inj:
-                    for d in BuffUsage_inj[l]:
-                        BuffUsage_inj[l][d] = BuffUsage_inj[l][d].add(
-                                BuffUsage_run[l][d], fill_value=0)
-            # input('press any key')
-            shutil.rmtree(currentSimdir)
-
+    for injIter in range(len(injectionRates)):
         # Calculate the average and std for VC usage.
         VCUsage_temp = []
-        for df in VCUsage_inj:
-            if not df.empty:
-                VCUsage_temp.append(df.groupby(df.index).agg(['mean', 'std']))
+        for stats in VCUsage_inj[injIter]:
+            if stats.count:
+                VCUsage_temp.append(stats.frame())
         VCUsage.append(VCUsage_temp)
 
         # Average the buffer usage over restarts.
-        BuffUsage_temp = init_data_structure()  # a dict of dicts
-        for l in BuffUsage_inj:
-            for d in BuffUsage_inj[l]:
-                BuffUsage_temp[l][d] = np.ceil(BuffUsage_inj[l][d] / config.restarts)
+        BuffUsage_temp = {}  # a dict of dicts
+        for l in BuffUsage_inj[injIter]:
+            BuffUsage_temp[l] = {}
+            for d in BuffUsage_inj[injIter][l]:
+                BuffUsage_temp[l][d] = np.ceil(BuffUsage_inj[injIter][l][d] / BuffUsage_runs[injIter])
         BuffUsage.append(BuffUsage_temp)
 
-        injIter += 1
-
     print('Executed all sims of all injection rates.')
 
     results = {'latenciesFlit': latenciesFlit,
                'latenciesNetwork': latenciesNetwork,
                'latenciesPacket': latenciesPacket,
+               'saturated': saturated,
+               'seeds': seeds,
                'injectionRates': injectionRates,
                'VCUsage': VCUsage,
                'BuffUsage': BuffUsage}
+    if power is not None:
+        results.update(powers)
     return results
 ###############################################################################
 
 
-def save_results(results, results_file):
+def save_results(results, store, experiment):
     """
-    Save the results to a pickle file.
+    Save the results to the columnar results store.
 
     Parameters:
         - results: a dictionary of the results.
-        - result_file: the path to the pickle file.
+        - store: the root directory of the results store.
+        - experiment: the name of the experiment in the store.
 
     Return:
         - None.
     """
-    with open(results_file, 'wb') as f:
-        pickle.dump(results, f)
+    results_store.save_results(results, store, experiment)
 ###############################################################################
 
 
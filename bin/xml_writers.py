@@ -21,8 +21,8 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 ###############################################################################
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 import numpy as np
+import bisect
 ###############################################################################
 
 
@@ -35,12 +35,60 @@ class Writer:
 
     def write_file(self, output_file):
         """ Write the xml file on disk """
-        rough_string = ET.tostring(self.root_node, 'utf-8')
-        reparsed = minidom.parseString(rough_string)
-        data = reparsed.toprettyxml(indent="  ")
-        of = open(output_file, 'w')
-        of.write(data)
-        of.close()
+        with open(output_file, 'w') as of:
+            of.write('<?xml version="1.0" ?>\n')
+            write_element(of, self.root_node)
+###############################################################################
+
+
+def escape(data):
+    """ Escape text and attribute values like minidom does """
+    return data.replace('&', '&amp;').replace('<', '&lt;'). \
+        replace('"', '&quot;').replace('>', '&gt;')
+
+
+def write_element(of, elem, indent='', addindent='  '):
+    """
+    Stream an element to a file, in the layout of minidom's toprettyxml.
+
+    The lines are written as the tree is walked, so no string or DOM copy
+    of the document is held in memory.
+
+    Parameters:
+        - of: the file object.
+        - elem: the ElementTree element.
+        - indent: the indentation of the element.
+        - addindent: the indentation added per level.
+
+    Return:
+        - None.
+    """
+    of.write(indent + '<' + elem.tag)
+    for name, value in elem.attrib.items():
+        of.write(' %s="%s"' % (name, escape(value)))
+    # the child nodes of the DOM: the text, the elements and their tails
+    children = []
+    if elem.text:
+        children.append(elem.text)
+    for child in elem:
+        children.append(child)
+        if child.tail:
+            children.append(child.tail)
+    if not children:
+        of.write('/>\n')
+        return
+    of.write('>')
+    if len(children) == 1 and isinstance(children[0], str):
+        of.write(escape(children[0]))
+    else:
+        of.write('\n')
+        for child in children:
+            if isinstance(child, str):
+                of.write(escape(indent + addindent + child + '\n'))
+            else:
+                write_element(of, child, indent + addindent, addindent)
+        of.write(indent)
+    of.write('</%s>\n' % elem.tag)
 ###############################################################################
 
 
@@ -249,22 +297,25 @@ class NetworkWriter(Writer):
     def __init__(self, config):
         Writer.__init__(self, 'network-on-chip')
         self.config = config
+        # The positions are index * step, built from integer indices so a
+        # row always has exactly x entries (np.arange(0, 1+step, step) may
+        # overshoot by one).
         if self.config.z == 1:
             self.z_step = 1
             self.z_range = np.arange(0, 1, self.config.z)
         else:
             self.z_step = 1/(self.config.z - 1)
-            self.z_range = np.arange(0, 1+self.z_step, self.z_step)
+            self.z_range = np.arange(self.config.z) * self.z_step
         self.x_step = []
         self.x_range = []
         for x in self.config.x:
             self.x_step.append(1/(x - 1))
-            self.x_range.append(np.arange(0, 1+self.x_step[-1], self.x_step[-1]))
+            self.x_range.append(np.arange(x) * self.x_step[-1])
         self.y_step = []
         self.y_range = []
         for y in self.config.y:
             self.y_step.append(1/(y - 1))
-            self.y_range.append(np.arange(0, 1+self.y_step[-1], self.y_step[-1]))
+            self.y_range.append(np.arange(y) * self.y_step[-1])
 
     def write_header(self):
         bufferDepthType_node = ET.SubElement(self.root_node, 'bufferDepthType')
@@ -352,28 +403,28 @@ class NetworkWriter(Writer):
         vcCount_node = ET.SubElement(port_node, 'vcCount')
         vcCount_node.set('value', str(vcCount))
 
-    def make_con(self, connections_node, con_id, src_node, dst_node):
-        #print("binding " + str(src_node) + " to " + str(dst_node))
-        dupCon = self.is_duplicate_con(connections_node, src_node, dst_node)
-        if not dupCon:
-            self.construct_con(connections_node, con_id, src_node, dst_node)
-            return con_id + 1
-        return con_id
-
-    def is_duplicate_con(self, connections_node, src_node, dst_node):
-        for con in connections_node:
-            check1 = False
-            check2 = False
-            for port in con.iter('port'):
-                node = port.find('node')
-                node_id = int(node.get('value'))
-                if node_id == dst_node:
-                    check1 = True
-                elif node_id == src_node:
-                    check2 = True
-            if check1 and check2:
-                return True
-        return False
+    def make_con(self, connections_node, con_id, src_node, dst_node,
+                 already_connected):
+        """
+        Add a connection unless the two nodes are connected already.
+
+        Parameters:
+            - connections_node: the connections element.
+            - con_id: the id of the new connection.
+            - src_node, dst_node: the ids of the two nodes.
+            - already_connected: the set of (lower id, higher id) tuples of
+            the existing connections.
+
+        Return:
+            - The id of the next connection.
+        """
+        connection_tuple = (min(src_node, dst_node), max(src_node, dst_node))
+        if connection_tuple in already_connected:
+            return con_id
+        already_connected.add(connection_tuple)
+        self.construct_con(connections_node, con_id, connection_tuple[1],
+                           connection_tuple[0])
+        return con_id + 1
 
     def construct_con(self, connections_node, con_id, src_node, dst_node):
         con_node = ET.SubElement(connections_node, 'con')
@@ -387,105 +438,71 @@ class NetworkWriter(Writer):
         self.make_port(ports_node, 1, dst_node, con_to_dst_vcCount)
 
     def getLayerForNode(self, node_id):
-        for z in range(len(self.nodeToLayerAssignementList)):
-            if node_id in self.nodeToLayerAssignementList[z]:
-                return z
-        return -1
+        """ Return the layer of a router, -1 for processing elements """
+        if node_id >= self.layer_offsets[-1]:
+            return -1
+        return bisect.bisect_right(self.layer_offsets, node_id) - 1
+
+    def vertical_neighbour(self, z, xi, yi, dst_z):
+        """
+        Find the router of another layer at the same position.
+
+        Parameters:
+            - z, xi, yi: the layer and the column and row index of a router.
+            - dst_z: the other layer.
+
+        Return:
+            - The id of the router at the same position on layer dst_z, or
+            None if that layer has no router there.
+        """
+        # xi/(x-1) == dst_xi/(dst_x-1), solved in integers
+        x_steps = self.config.x[z] - 1
+        y_steps = self.config.y[z] - 1
+        dst_x_steps = self.config.x[dst_z] - 1
+        dst_y_steps = self.config.y[dst_z] - 1
+        if (xi * dst_x_steps) % x_steps or (yi * dst_y_steps) % y_steps:
+            return None
+        dst_xi = xi * dst_x_steps // x_steps
+        dst_yi = yi * dst_y_steps // y_steps
+        return (self.layer_offsets[dst_z] + dst_yi * self.config.x[dst_z]
+                + dst_xi)
 
     def write_connections(self):
         connections_node = ET.SubElement(self.root_node, 'connections')
         con_id = 0
-        node_id = 0
         nodecounts = []
         for (x, y) in zip(self.config.x, self.config.y):
             nodecounts.append(x*y)
         nodecount = sum(nodecounts)
+        # the id of the first router of each layer, and the number of routers
+        self.layer_offsets = [sum(nodecounts[:z])
+                              for z in range(self.config.z + 1)]
         already_connected = set()
 
-        z = 0
-        self.nodeToLayerAssignementList = []
-        for zi in range(self.config.z):
-            self.nodeToLayerAssignementList.append([])
-            for yi in range(self.config.y[z]):
-                for xi in range(self.config.x[z]):
-                    self.nodeToLayerAssignementList[int(z)].append(node_id)
-                    node_id = node_id + 1
-            z = z + 1
-
-        node_id = 0
-        z = 0
-        for zi in self.z_range:
-            for yi in self.y_range[z]:
-                for xi in self.x_range[z]:
-                    # create Local
-                    #print("connecting local from " + str(node_id) + " to " + str(node_id + nodecount))
-                    connection_tuple = (min(node_id, node_id + nodecount), max(node_id , node_id + nodecount))
-                    if not connection_tuple in already_connected:
-                        con_id = self.make_con(connections_node, con_id, connection_tuple[1], connection_tuple[0])
-                        already_connected.add(connection_tuple)
-                    if xi > 0:  # create West
-                        connection_tuple = (node_id - 1, node_id)
-                        if not connection_tuple in already_connected:
-                            con_id = self.make_con(connections_node, con_id, connection_tuple[1], connection_tuple[0])
-                            already_connected.add(connection_tuple)
-                        #con_id = self.make_con(connections_node, con_id, node_id, node_id-1)
-                    if xi < 0.95:  # create East
-                        connection_tuple = (node_id, node_id + 1)
-                        if not connection_tuple in already_connected:
-                            con_id = self.make_con(connections_node, con_id, connection_tuple[1], connection_tuple[0])
-                            already_connected.add(connection_tuple)
-                        #con_id = self.make_con(connections_node, con_id, node_id, node_id+1)
-                    if yi > 0:  # create South
-                        connection_tuple = (min(node_id, node_id-self.config.x[z]), max(node_id , node_id-self.config.x[z]))
-                        if not connection_tuple in already_connected:
-                            con_id = self.make_con(connections_node, con_id, connection_tuple[1], connection_tuple[0])
-                            already_connected.add(connection_tuple)
-                        #con_id = self.make_con(connections_node, con_id, node_id, node_id-self.config.x[z])
-                    if yi < 0.95:  # create North
-                        connection_tuple = (min(node_id, node_id+self.config.x[z]), max(node_id , node_id+self.config.x[z]))
-                        if not connection_tuple in already_connected:
-                            con_id = self.make_con(connections_node, con_id, connection_tuple[1], connection_tuple[0])
-                            already_connected.add(connection_tuple)
-                        #con_id = self.make_con(connections_node, con_id, node_id, node_id+self.config.x[z])
-                    if zi > 0 and self.config.z != 1:  # create Down
-                        x_finder = np.where(self.x_range[z - 1] == xi)
-                        x_index = -1
-                        y_finder = np.where(self.y_range[z - 1] == yi)
-                        y_index = -1
-                        if (len(x_finder[0]) != 0):
-                            x_index = x_finder[0][0]
-                        if (len(y_finder[0]) != 0):
-                            y_index = y_finder[0][0]
-                        if (x_index != -1 and y_index != -1):
-                            previous_node_count = 0
-                            if (z > 1):
-                                previous_node_count = sum(nodecounts[ 0 : int(z) - 1 ])
-                            dst_id = previous_node_count + y_index * self.config.x[z - 1] + x_index
-                            #print("connecting " + str(node_id) + " with " + str(dst_id))
-                            connection_tuple = (min(node_id, dst_id), max(node_id , dst_id))
-                            if not connection_tuple in already_connected:
-                                con_id = self.make_con(connections_node, con_id, connection_tuple[1], connection_tuple[0])
-                                already_connected.add(connection_tuple)
-                            #con_id = self.make_con(connections_node, con_id, node_id, dst_id)
-                    if zi < 0.95 and self.config.z != 1:  # create Up
-                        x_finder = np.where(self.x_range[z + 1] == xi)
-                        x_index = -1
-                        y_finder = np.where(self.y_range[z + 1] == yi)
-                        y_index = -1
-                        if (len(x_finder[0]) != 0):
-                            x_index = x_finder[0][0]
-                        if (len(y_finder[0]) != 0):
-                            y_index = y_finder[0][0]
-                        if (x_index != -1 and y_index != -1):
-                            previous_node_count = sum(nodecounts[ 0 : int(z) + 1 ])
-                            dst_id = previous_node_count + y_index * self.config.x[z + 1] + x_index
-                            connection_tuple = (min(node_id, dst_id), max(node_id , dst_id))
-                            if not connection_tuple in already_connected:
-                                con_id = self.make_con(connections_node, con_id, connection_tuple[1], connection_tuple[0])
-                                already_connected.add(connection_tuple)
-                            #con_id = self.make_con(connections_node, con_id, node_id, dst_id)
-                    node_id += 1
-            z += 1
+        for z in range(self.config.z):
+            x_count = self.config.x[z]
+            y_count = self.config.y[z]
+            for yi in range(y_count):
+                for xi in range(x_count):
+                    node_id = self.layer_offsets[z] + yi * x_count + xi
+                    neighbours = [node_id + nodecount]  # Local
+                    if xi > 0:  # West
+                        neighbours.append(node_id - 1)
+                    if xi < x_count - 1:  # East
+                        neighbours.append(node_id + 1)
+                    if yi > 0:  # South
+                        neighbours.append(node_id - x_count)
+                    if yi < y_count - 1:  # North
+                        neighbours.append(node_id + x_count)
+                    if z > 0:  # Down
+                        neighbours.append(self.vertical_neighbour(z, xi, yi, z - 1))
+                    if z < self.config.z - 1:  # Up
+                        neighbours.append(self.vertical_neighbour(z, xi, yi, z + 1))
+                    for dst_id in neighbours:
+                        if dst_id is not None:
+                            con_id = self.make_con(connections_node, con_id,
+                                                   node_id, dst_id,
+                                                   already_connected)
 
     def write_network(self, file_name):
         self.write_header()
@@ -499,6 +516,66 @@ class NetworkWriter(Writer):
 ###############################################################################
 
 
+class TopologyWriter(NetworkWriter):
+    """ Write a topologies.Topology as network file """
+
+    def __init__(self, config, topology):
+        Writer.__init__(self, 'network-on-chip')
+        self.config = config
+        self.topology = topology
+        if topology.num_layers != self.config.z:
+            raise ValueError('the topology has %d layers, but z is %d'
+                             % (topology.num_layers, self.config.z))
+
+    def write_nodes(self, nodes_node, node_type):
+        num_routers = self.topology.num_routers
+        if node_type == 'Router':
+            node_id = 0
+            nodeType_offset = 0
+        else:
+            node_id = num_routers
+            nodeType_offset = self.config.z
+        idTypes = [0] * self.config.z
+        for (xi, yi, zi), layer in zip(self.topology.positions,
+                                       self.topology.layers):
+            node_node = ET.SubElement(nodes_node, 'node')
+            node_node.set('id', str(node_id))
+            xPos_node = ET.SubElement(node_node, 'xPos')
+            xPos_node.set('value', str(xi))
+            yPos_node = ET.SubElement(node_node, 'yPos')
+            yPos_node.set('value', str(yi))
+            zPos_node = ET.SubElement(node_node, 'zPos')
+            zPos_node.set('value', str(zi))
+            nodeType_node = ET.SubElement(node_node, 'nodeType')
+            nodeType_node.set('value', str(nodeType_offset + layer))
+            idType_node = ET.SubElement(node_node, 'idType')
+            idType_node.set('value', str(idTypes[layer]))
+            layer_node = ET.SubElement(node_node, 'layer')
+            layer_node.set('value', str(layer))
+            node_id += 1
+            idTypes[layer] += 1
+
+    def getLayerForNode(self, node_id):
+        """ Return the layer of a router, -1 for processing elements """
+        if node_id >= self.topology.num_routers:
+            return -1
+        return int(self.topology.layers[node_id])
+
+    def write_connections(self):
+        connections_node = ET.SubElement(self.root_node, 'connections')
+        num_routers = self.topology.num_routers
+        con_id = 0
+        for router in range(num_routers):
+            self.construct_con(connections_node, con_id,
+                               router + num_routers, router)
+            con_id += 1
+        for src, dst in self.topology.links:
+            self.construct_con(connections_node, con_id, int(max(src, dst)),
+                               int(min(src, dst)))
+            con_id += 1
+###############################################################################
+
+
 class ConfigWriter(Writer):
     """ The Config writer class """
 
@@ -524,6 +601,15 @@ class ConfigWriter(Writer):
         bitWidth_node.set('value', str(self.config.bitWidth))
         Vdd_node = ET.SubElement(noc_node, 'Vdd')
         Vdd_node.set('value', '5')
+        if self.config.routing == 'Table':
+            routingTable_node = ET.SubElement(noc_node, 'routingTable')
+            mode_node = ET.SubElement(routingTable_node, 'routingTable_mode')
+            mode_node.set('value', 'true')
+            path_node = ET.SubElement(routingTable_node, 'routingTable_path')
+            path_node.set('value', 'config/RT.txt')
+            matrix_node = ET.SubElement(routingTable_node,
+                                        'directionMatrix_path')
+            matrix_node.set('value', 'config/Direction_Mat.txt')
 
     def write_phase(self, synthetic_node, name, start, duration):
         phase_node = ET.SubElement(synthetic_node, 'phase')
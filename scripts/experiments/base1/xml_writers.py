@@ -21,7 +21,6 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 ###############################################################################
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 import numpy as np
 ###############################################################################
 
@@ -35,12 +34,60 @@ class Writer:
 
     def write_file(self, output_file):
         """ Write the xml file on disk """
-        rough_string = ET.tostring(self.root_node, 'utf-8')
-        reparsed = minidom.parseString(rough_string)
-        data = reparsed.toprettyxml(indent="  ")
-        of = open(output_file, 'w')
-        of.write(data)
-        of.close()
+        with open(output_file, 'w') as of:
+            of.write('<?xml version="1.0" ?>\n')
+            write_element(of, self.root_node)
+###############################################################################
+
+
+def escape(data):
+    """ Escape text and attribute values like minidom does """
+    return data.replace('&', '&amp;').replace('<', '&lt;'). \
+        replace('"', '&quot;').replace('>', '&gt;')
+
+
+def write_element(of, elem, indent='', addindent='  '):
+    """
+    Stream an element to a file, in the layout of minidom's toprettyxml.
+
+    The lines are written as the tree is walked, so no string or DOM copy
+    of the document is held in memory.
+
+    Parameters:
+        - of: the file object.
+        - elem: the ElementTree element.
+        - indent: the indentation of the element.
+        - addindent: the indentation added per level.
+
+    Return:
+        - None.
+    """
+    of.write(indent + '<' + elem.tag)
+    for name, value in elem.attrib.items():
+        of.write(' %s="%s"' % (name, escape(value)))
+    # the child nodes of the DOM: the text, the elements and their tails
+    children = []
+    if elem.text:
+        children.append(elem.text)
+    for child in elem:
+        children.append(child)
+        if child.tail:
+            children.append(child.tail)
+    if not children:
+        of.write('/>\n')
+        return
+    of.write('>')
+    if len(children) == 1 and isinstance(children[0], str):
+        of.write(escape(children[0]))
+    else:
+        of.write('\n')
+        for child in children:
+            if isinstance(child, str):
+                of.write(escape(indent + addindent + child + '\n'))
+            else:
+                write_element(of, child, indent + addindent, addindent)
+        of.write(indent)
+    of.write('</%s>\n' % elem.tag)
 ###############################################################################
 
 
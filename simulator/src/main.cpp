@@ -50,6 +50,7 @@ int sc_main(int arg_num, char* arg_vec[])
 
     if (arg_num==2) {
         globalResources.readConfigFile(arg_vec[1]);
+        globalReport.readConfigFile(arg_vec[1]);
     }
     else {
 #ifndef ENABLE_NETRACE
@@ -68,7 +69,9 @@ int sc_main(int arg_num, char* arg_vec[])
     globalReport.resizeMatrices();
 
     rep.connect("127.0.0.1", "10000");
-    rep.startRun("name");
+    // the working directory identifies the run of a sweep
+    char runDir[4096];
+    rep.startRun(getcwd(runDir, sizeof runDir) ? runDir : "name");
 
 #ifdef ENABLE_NETRACE
     po::variables_map vm;
@@ -23,8 +23,11 @@
 
 #include "NoC.h"
 
-NoC::NoC(sc_module_name nm):context(1), socket(context, ZMQ_REP){
+NoC::NoC(sc_module_name nm):context(1), socket(context, ZMQ_PUB){
 #ifdef ENABLE_GUI
+    // a few frames are queued per subscriber, later ones are dropped
+    int highWaterMark = 4;
+    socket.setsockopt(ZMQ_SNDHWM, &highWaterMark, sizeof(highWaterMark));
     socket.bind ("tcp://*:5555");
 #endif
     dbid = rep.registerElement("NoC", 0);
@@ -43,8 +46,13 @@ NoC::NoC(sc_module_name nm):context(1), socket(context, ZMQ_REP){
     SC_THREAD(verifyFlowControl);
 #endif
 #ifdef ENABLE_GUI
-    SC_THREAD(guiServer);
+    if (globalResources.telemetryInterval > 0) {
+        SC_THREAD(guiServer);
+    }
 #endif
+    if (globalResources.progressInterval > 0) {
+        SC_THREAD(writeProgress);
+    }
 }
 
 void NoC::createClocks() {
@@ -146,59 +154,47 @@ void NoC::createLinks(const std::vector<std::unique_ptr<sc_clock>> &clocks) {
 
 #ifdef ENABLE_GUI
 void NoC::guiServer(){
-    using boost::property_tree::ptree;
+    // Publishes a frame every telemetryInterval ns: a TelemetryHeader,
+    // followed by the average buffer usage of each router as float, in the
+    // order of the router ids. Subscribers which fall behind lose frames,
+    // the simulation does not wait for them.
+    std::vector<std::vector<BufferFIFO<Flit *> *>> routerBuffers;
+    for (auto &c : globalResources.nodes) {
+        if (c.type->model == "RouterVC") {
+            RouterVC *router = dynamic_cast<RouterVC *>(networkParticipants.at(c.id));
+            std::vector<BufferFIFO<Flit *> *> buffers;
+            int nodeConnsSize = router->node.connections.size();
+            for (unsigned int conPos = 0; conPos < nodeConnsSize; conPos++) {
+                Connection *con = &globalResources.connections.at(router->node.connections.at(conPos));
+                int vcCount = con->getVCCountForNode(router->node.id);
+                for (int vc = 0; vc < vcCount; vc++) {
+                    buffers.push_back(router->buffers.at(conPos)->at(vc));
+                }
+            }
+            routerBuffers.push_back(buffers);
+        }
+    }
 
+    TelemetryHeader header;
+    header.magic = TELEMETRY_MAGIC;
+    header.numRouters = routerBuffers.size();
+    size_t frameSize = sizeof(header) + header.numRouters * sizeof(float);
     while (1) {
-        wait(1, SC_NS);
+        wait(globalResources.telemetryInterval, SC_NS);
         wait(SC_ZERO_TIME);
         wait(SC_ZERO_TIME);
-        zmq::message_t request;
-        socket.recv(&request, ZMQ_NOBLOCK);
-        if (request.size() != 0) {
-            ptree pt;
-            ptree children;
-            int numberOfRouter = globalResources.nodes.size() / 2;
-            std::vector<ptree> routerChilds;
-            routerChilds.resize(numberOfRouter);
-            int childCounter = 0;
-            for (auto &c : globalResources.nodes) {
-                if (c.type->model == "RouterVC") {
-                    RouterVC *router = dynamic_cast<RouterVC *>(networkParticipants.at(c.id));
-                    float divisionNumberForAverage = 0.0;
-                    float sumForAverage = 0.0;
-                    int nodeConnsSize = router->node.connections.size();
-                    for (unsigned int conPos = 0; conPos < nodeConnsSize; conPos++) {
-                        Connection *con = &globalResources.connections.at(router->node.connections.at(conPos));
-                        int vcCount = con->getVCCountForNode(router->node.id);
-                        for (int vc = 0; vc < vcCount; vc++) {
-                            BufferFIFO<Flit *> *buf = router->buffers.at(conPos)->at(vc);
-                            sumForAverage += (float) buf->occupied();
-                            divisionNumberForAverage++;
-                        }
-                    }
-                    float average = sumForAverage / divisionNumberForAverage;
-
-                    std::string fieldname = std::string("averagebufferusage");// + std::to_string(router->id);
-                    routerChilds.at(childCounter).put(fieldname, average);
-                    childCounter++;
-                }
-            }
-            for (auto child : routerChilds) {
-                children.push_back(std::make_pair("", child));
+        zmq::message_t frame(frameSize);
+        header.time = sc_time_stamp().to_double();
+        memcpy(frame.data(), &header, sizeof(header));
+        float *usage = reinterpret_cast<float *>(static_cast<char *>(frame.data()) + sizeof(header));
+        for (unsigned int r = 0; r < header.numRouters; r++) {
+            float sumForAverage = 0.0;
+            for (auto buf : routerBuffers.at(r)) {
+                sumForAverage += (float) buf->occupied();
             }
-            ptree timeChild;
-            timeChild.put("time", sc_time_stamp().to_double());
-            pt.add_child("Data", children);
-            pt.add_child("Time", timeChild);
-
-            std::stringstream ss;
-            boost::property_tree::json_parser::write_json(ss, pt);
-            std::string jsonstring = ss.str();
-
-            zmq::message_t reply(jsonstring.size());
-            memcpy(reply.data(), jsonstring.c_str(), jsonstring.size());
-            socket.send(reply, ZMQ_NOBLOCK);
+            usage[r] = sumForAverage / routerBuffers.at(r).size();
         }
+        socket.send(frame, ZMQ_NOBLOCK);
     }
 }
 #endif
@@ -284,6 +280,22 @@ while (1) {
 }
 #endif
 
+void NoC::writeProgress() {
+    // Periodic snapshot of the run, lets a sweep runner detect saturated
+    // runs without waiting for the end of the simulation.
+    std::ofstream progressFile("progress.csv");
+    progressFile << "time, undeliveredPackages, backlogPerPE, avgNetworkLat" << std::endl;
+    double numOfPEs = globalResources.nodes.size() / 2;
+    while (1) {
+        wait(globalResources.progressInterval, SC_NS);
+        progressFile << boost::format("%.0f, %d, %.3f, %.3f")
+                % (sc_time_stamp().to_double() / 1000)
+                % globalReport.undeliveredPackages
+                % (globalReport.undeliveredPackages / numOfPEs)
+                % (globalReport.latencyNetwork.average() / 1000) << std::endl;
+    }
+}
+
 void NoC::runNoC() {
     for (auto &r : networkParticipants) {
         r->initialize();
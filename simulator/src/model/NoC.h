@@ -54,6 +54,14 @@
 #include "model/traffic/task/TaskPool.h"
 #include "model/traffic/netrace/NetracePool.h"
 
+// The header of a telemetry frame of the GUI server, see NoC::guiServer
+const uint32_t TELEMETRY_MAGIC = 0x4D4C4554; // "TELM"
+struct TelemetryHeader {
+    uint32_t magic;
+    uint32_t numRouters;
+    double time; // ps
+};
+
 class NoC : public sc_module {
 public:
     PacketFactory& packetFactory = PacketFactory::getInstance();
@@ -70,6 +78,7 @@ public:
 #ifdef ENABLE_GUI
     void guiServer();
 #endif
+    void writeProgress();
 
 private:
     GlobalResources& globalResources = GlobalResources::getInstance();
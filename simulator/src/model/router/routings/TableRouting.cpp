@@ -46,6 +46,12 @@ int TableRouting::route(int src_node_id, int dst_node_id)
     else if (direction==3) {
         con_pos = src_node.getConPosOfDir(DIR::North);
     }
+    else if (direction==5) {
+        con_pos = src_node.getConPosOfDir(DIR::Up);
+    }
+    else if (direction==6) {
+        con_pos = src_node.getConPosOfDir(DIR::Down);
+    }
 
     //std::cout<<"Src: "<<src<<", Dst: "<<dst<<", Next: "<<direction<<", Connection: "<<con_pos<<std::endl;
 
@@ -44,9 +44,18 @@ void ntNetrace::nt_open_trfile( const char* trfilename ) {
     int i;
     int length = 20;
     for( i = 0; trfilename[i] != 0; i++, length++ );
-    nt_input_popencmd = (char*) malloc( length * sizeof(char) );
-    sprintf( nt_input_popencmd, "bzip2 -dc %s", trfilename );
-    nt_input_tracefile = popen( nt_input_popencmd, "r" );
+    // Traces which are not bzip2 compressed (see tests/netrace/trace_cache.py)
+    // are read directly, so regions can be reached with fseek.
+    size_t name_length = strlen( trfilename );
+    nt_input_compressed = name_length < 4 || strcmp( trfilename + name_length - 4, ".bz2" ) == 0;
+    if( nt_input_compressed ) {
+        nt_input_popencmd = (char*) malloc( length * sizeof(char) );
+        sprintf( nt_input_popencmd, "bzip2 -dc %s", trfilename );
+        nt_input_tracefile = popen( nt_input_popencmd, "r" );
+    } else {
+        nt_input_popencmd = NULL;
+        nt_input_tracefile = fopen( trfilename, "rb" );
+    }
     if( nt_input_tracefile == NULL ) {
         std::cout << "failed to open pipe to trace file" << std::endl;
     }
@@ -153,25 +162,31 @@ void ntNetrace::nt_seek_region( nt_regionhead_t* region ) {
         if( region != NULL ) {
             // Clear all existing dependencies
             nt_delete_all_dependencies();
-            // Reopen file to fast-forward to region
-            // fseek doesn't work on compressed file
-            pclose( nt_input_tracefile );
-            nt_input_tracefile = popen( nt_input_popencmd, "r" );
             unsigned long long int seek_offset = nt_get_headersize() + region->seek_offset;
-            unsigned long long int read_length = 4096;
-            char* buffer = (char*) malloc( read_length );
-            while( seek_offset > read_length ) {
-                if( (err = fread( buffer, 1, read_length, nt_input_tracefile )) < 0 ) {
+            if( !nt_input_compressed ) {
+                if( fseeko( nt_input_tracefile, seek_offset, SEEK_SET ) != 0 ) {
+                    std::cout <<  "failed to seek region" << std::endl;
+                }
+            } else {
+                // Reopen file to fast-forward to region
+                // fseek doesn't work on compressed file
+                pclose( nt_input_tracefile );
+                nt_input_tracefile = popen( nt_input_popencmd, "r" );
+                unsigned long long int read_length = 4096;
+                char* buffer = (char*) malloc( read_length );
+                while( seek_offset > read_length ) {
+                    if( (err = fread( buffer, 1, read_length, nt_input_tracefile )) < 0 ) {
+                        sprintf( strerr, "failed to seek region: error = %d\n", err );
+                        std::cout <<  strerr << std::endl;
+                    }
+                    seek_offset -= read_length;
+                }
+                if( (err = fread( buffer, 1, seek_offset, nt_input_tracefile )) < 0 ) {
                     sprintf( strerr, "failed to seek region: error = %d\n", err );
                     std::cout <<  strerr << std::endl;
                 }
-                seek_offset -= read_length;
-            }
-            if( (err = fread( buffer, 1, seek_offset, nt_input_tracefile )) < 0 ) {
-                sprintf( strerr, "failed to seek region: error = %d\n", err );
-                std::cout <<  strerr << std::endl;
+                free( buffer );
             }
-            free( buffer );
             if( nt_self_throttling ) {
                 // Prime the pump to read in self throttled packets
                 nt_prime_self_throttle();
@@ -459,7 +474,11 @@ void ntNetrace::nt_empty_cleared_packets_list() {
 
 void ntNetrace::nt_close_trfile() {
     if( nt_input_tracefile != NULL ) {
-        pclose( nt_input_tracefile );
+        if( nt_input_compressed ) {
+            pclose( nt_input_tracefile );
+        } else {
+            fclose( nt_input_tracefile );
+        }
         nt_input_tracefile = NULL;
         nt_free_trheader( nt_input_trheader );
         if( nt_input_popencmd != NULL ) {
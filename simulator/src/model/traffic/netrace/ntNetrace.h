@@ -110,6 +110,7 @@ public:
 // Data Members
     char*                nt_input_popencmd;
     FILE*                nt_input_tracefile;
+    int                  nt_input_compressed;
     char*                nt_input_buffer;
     nt_header_t*        nt_input_trheader;
     int nt_dependencies_off;
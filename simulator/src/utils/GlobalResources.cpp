@@ -198,6 +198,15 @@ void GlobalResources::readConfigFile(const std::string& configPath)
     outputToFile = gen_node.child("outputToFile").attribute("value").as_bool();
     outputFileName = gen_node.child("outputToFile").child_value();
     activateFlitTracing = gen_node.child("flitTracing").attribute("value").as_bool();
+    progressInterval = gen_node.child("progressInterval").attribute("value").as_int(0);
+    telemetryInterval = gen_node.child("telemetryInterval").attribute("value").as_int(100);
+    // A seed given in the config replaces the one drawn from random_device,
+    // so runs can be reproduced.
+    pugi::xml_node seed_node = gen_node.child("seed");
+    if (seed_node) {
+        rd_seed = seed_node.attribute("value").as_uint();
+        rand->seed(rd_seed);
+    }
 
     //ROUTING TABLE
     pugi::xml_node Routing_node = doc.child("configuration").child("noc").child("routingTable");
@@ -44,6 +44,8 @@ public:
     std::vector<float> zPositions;
     //General
     int simulation_time;
+    int progressInterval = 0; // ns between lines of progress.csv, 0 = off
+    int telemetryInterval = 100; // ns between frames of the GUI server, 0 = off
     bool outputToFile;
     bool activateFlitTracing;
     std::string outputFileName;
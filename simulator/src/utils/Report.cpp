@@ -62,7 +62,10 @@ void Report::close()
 {
     logfile.close();
     send();
-    ::close(socketfd);
+    sendBuffer.clear();
+    if (socketfd>0) {
+        ::close(socketfd);
+    }
     networkDisabled = true;
 }
 
@@ -73,8 +76,10 @@ void Report::startRun(const std::string& name)
 
 int Report::registerElement(const std::string& type, int id)
 {
-    addToSendBuffer("reg;"+std::to_string(element_count)+";"+type+";"+std::to_string(id));
-    return ++element_count;
+    // register the element under the id its events are reported with
+    int element_id = ++element_count;
+    addToSendBuffer("reg;"+std::to_string(element_id)+";"+type+";"+std::to_string(id));
+    return element_id;
 }
 
 void Report::reportEvent(int element_id, const std::string& event, const std::string& data)
@@ -114,19 +119,33 @@ void Report::log(bool qualifier, const std::string& message, int type)
 
 void Report::addToSendBuffer(const std::string& str)
 {
-    if (!networkDisabled && sendBuffer.length()+str.length()>=MAX_BUFFER_SIZE) {
+    if (networkDisabled) {
+        return;
+    }
+    if (sendBuffer.length()+str.length()>=MAX_BUFFER_SIZE) {
         send();
-        sendBuffer = "";
+        sendBuffer.clear();
     }
     sendBuffer += str+"|";
 }
 
 void Report::send()
 {
-    try {
-        //::send(socketfd, sendBuffer.c_str(), sendBuffer.length(), 0);
-    }
-    catch (std::exception&) {
-        std::cout << "Can't send the report!" << std::endl;
+    const char* data = sendBuffer.c_str();
+    size_t remaining = sendBuffer.length();
+    while (!networkDisabled && remaining>0) {
+        ssize_t sent = ::send(socketfd, data, remaining, MSG_NOSIGNAL);
+        if (sent==-1) {
+            if (errno==EINTR) {
+                continue;
+            }
+            std::cout << "Report: send() failed -> " << std::strerror(errno) << std::endl;
+            std::cout << "Disabling database reports" << std::endl;
+            networkDisabled = true;
+        }
+        else {
+            data += sent;
+            remaining -= sent;
+        }
     }
 }
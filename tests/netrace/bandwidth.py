@@ -1,34 +1,52 @@
 import argparse
-import csv
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 
 
-def movingAverage(dataReader):
-    timeDataDict = {}
-    totalTimeBandwidthDict = {}
-    movingWindowLength = 100 #SC_NS
-
-    for row in dataReader:
-        time = float(row[0])/1000.0 #SC_NS
-        value = float(row[1])
-        if(time in timeDataDict):
-            timeDataDict[time] += value
-        else:
-            timeDataDict[time] = value
-        #clean Dict
-        minTime = time-movingWindowLength
-        timeDataDict = {k:v for (k,v) in timeDataDict.items() if k > minTime} #k = time, v = dataAmount(in time slot) #remove old/(not in Window) time-value pairs
-
-        #save averaged in finale Dict
-        deltaT = max(timeDataDict.keys())-min(timeDataDict.keys())
-        if((time > 100) & (deltaT > 0)):
-            dataAmount = sum(timeDataDict.values())
-            bandwidth = dataAmount/deltaT
-            totalTimeBandwidthDict[time] = bandwidth
-    return totalTimeBandwidthDict
+def readBandwidth(csvFilePath):
+    """
+    Read a report_Bandwidth_Input/Output.csv.
+
+    Return:
+        - The arrays of the times in ns (SC_NS) and of the bits sent at these
+        times.
+    """
+    data = np.loadtxt(csvFilePath, delimiter=',', skiprows=1, ndmin=2)
+    return data[:, 0] / 1000.0, data[:, 1]
+
+
+def movingAverage(times, values, movingWindowLength=100, decimation=1):
+    """
+    Average the bandwidth over a moving window.
+
+    The bandwidth at a time is the data sent in the window that ends at it,
+    divided by the time between its first and last sample. The data in the
+    windows are differences of the cumulative sum, and the windows start
+    where searchsorted finds them, so this is linear in the number of rows.
+
+    Parameters:
+        - times: the times in ns, see readBandwidth.
+        - values: the data sent at each time.
+        - movingWindowLength: the length of the window in ns. No bandwidth is
+        given for the first window.
+        - decimation: only every decimation-th point is returned.
+
+    Return:
+        - The arrays of the times and of the bandwidths at these times.
+    """
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    cumulative = np.concatenate([[0.0], np.cumsum(values[order])])
+    # a time which occurs in several rows includes all of them
+    ends = np.flatnonzero(np.diff(times, append=np.inf) > 0) + 1
+    time = times[ends - 1]
+    starts = np.searchsorted(times, time - movingWindowLength, side='right')
+    deltaT = time - times[starts]
+    valid = (time > movingWindowLength) & (deltaT > 0)
+    bandwidth = (cumulative[ends] - cumulative[starts])[valid] / deltaT[valid]
+    return time[valid][::decimation], bandwidth[::decimation]
 
 
 def generatePDF(title):
@@ -46,6 +64,10 @@ def generatePDF(title):
                     help="path to input file")
     parser.add_argument("-c", "--comparefile",
                     help="path to compare file")
+    parser.add_argument("-w", "--window", type=float, default=100,
+                    help="length of the moving window in ns")
+    parser.add_argument("--decimation", type=int, default=1,
+                    help="plot only every n-th point")
     args = parser.parse_args()
 
     csvFilePath = args.file
@@ -54,21 +76,14 @@ def generatePDF(title):
     csvCompareFilePath = args.comparefile
     csvCompareFilePath = 'report_Bandwidth_Output.csv'
 
-    csvfile = open(csvFilePath,  newline='')
-    bandwidthReader1 = csv.reader(csvfile, delimiter=',')
-    next(bandwidthReader1) #skip header line in File
-
-    csvComparefile = open(csvCompareFilePath,  newline='')
-    bandwidthReader2 = csv.reader(csvComparefile, delimiter=',')
-    next(bandwidthReader2) #skip header line in File
-
-
-    timeBandwidthDict1 = movingAverage(bandwidthReader1)
-    timeBandwidthDict2 = movingAverage(bandwidthReader2)
+    times1, bandwidth1 = movingAverage(*readBandwidth(csvFilePath),
+                                       args.window, args.decimation)
+    times2, bandwidth2 = movingAverage(*readBandwidth(csvCompareFilePath),
+                                       args.window, args.decimation)
 
     fig, ax = plt.subplots()
-    ax.plot(timeBandwidthDict1.keys(), timeBandwidthDict1.values())
-    ax.plot(timeBandwidthDict2.keys(), timeBandwidthDict2.values())
+    ax.plot(times1, bandwidth1)
+    ax.plot(times2, bandwidth2)
     ax.legend(["input bandwidth", "output bandwidth"])
 
     ax.set(xlabel='time (ns)', ylabel='bandwidth (Gbit/s)',
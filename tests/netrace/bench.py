@@ -2,6 +2,7 @@ from subprocess import call
 import shutil
 import os
 import bandwidth
+import trace_cache
 import xml.etree.ElementTree as ET
 import time
 from joblib import Parallel, delayed
@@ -22,7 +23,12 @@ def cleanDir():
             os.remove(file)
 ###############################################################################
 
-def write_sim_files(trace, simdir):
+# The simulated region of the traces, the PARSEC region of interest.
+# The traces are decompressed once into traceCacheDir from this region on.
+netraceRegion = 2
+traceCacheDir = 'trace_cache'
+
+def write_sim_files(simdir):
     confdir = simdir + '/config'
     
     shutil.rmtree(simdir, ignore_errors=True)
@@ -34,21 +40,20 @@ def write_sim_files(trace, simdir):
             raise
 
     shutil.copy('sim', simdir)
-    shutil.copy( trace + '.tra.bz2', simdir)
     shutil.copy('config/config.xml'	 , confdir)
     shutil.copy('config/ntConfig.xml', confdir)
     shutil.copy('config/network.xml' , confdir)
 ###############################################################################
 
 
-def run_individual_sim(trace, time, queuePos, currentQueuePos):
+def run_individual_sim(trace, cachedTrace, time, queuePos, currentQueuePos):
     #setup Folder
     simdir = trace
-    write_sim_files(trace, simdir)
+    write_sim_files(simdir)
     os.chdir(simdir)
 
     #start simulation
-    command = "./sim --simTime " +  str(time) + " --netraceTraceFile " + str(trace + ".tra.bz2") + " --netraceVerbosity none"
+    command = "./sim --simTime " +  str(time) + " --netraceTraceFile " + cachedTrace + " --netraceRegion " + str(netraceRegion) + " --netraceVerbosity none"
     print('start Simulation with ntraces-trace: ' + trace + '\n\t' + command)
     call(command, shell=True)
     bandwidth.generatePDF(trace)
@@ -65,11 +70,14 @@ def run_all_sims(traceNames, simTimes):
             httpAddr = "https://www.cs.utexas.edu/~netrace/download/" + trace + ".tra.bz2"
             call(["wget", httpAddr])    
 
+    #decompress the traces once, all runs share the cached traces
+    cachedTraces = [os.path.abspath(trace_cache.prepare_trace(trace + ".tra.bz2", traceCacheDir, netraceRegion))
+                    for trace in traceNames]
 
     print('Starting Sims with -1 processes')
     currentQueuePos = 0
     Parallel(n_jobs=-1)(delayed(run_individual_sim)
-        (trace, time, queuePos, currentQueuePos) for trace, time, queuePos in zip(traceNames, simTimes, range(len(simTimes))) )
+        (trace, cachedTrace, time, queuePos, currentQueuePos) for trace, cachedTrace, time, queuePos in zip(traceNames, cachedTraces, simTimes, range(len(simTimes))) )
 ###############################################################################
 
 def main():
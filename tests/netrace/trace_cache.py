@@ -0,0 +1,152 @@
+import bz2
+import os
+import json
+import struct
+import hashlib
+import argparse
+
+# The fixed part of the netrace header, see nt_header_pack in ntNetrace.cpp:
+# magic, version, benchmark name, number of nodes, padding, cycles, packets,
+# length of the notes, number of regions, padding.
+HEADER = struct.Struct('<If30sBxQQII8x')
+# One region of the header: seek offset, cycles and packets.
+REGION = struct.Struct('<QQQ')
+NT_MAGIC = 0x484A5455
+# Size of the chunks copied while decompressing
+CHUNK = 1 << 22
+###############################################################################
+
+
+def read_header(f):
+    """
+    Read the header of a decompressed netrace trace.
+
+    Parameters:
+        - f: the trace, opened for reading at its start.
+
+    Return:
+        - A dictionary of the header fields, 'regions' is a list of
+        (seek offset, cycles, packets) tuples and 'size' the size of the
+        header in bytes. The seek offsets count from the end of the header.
+    """
+    (magic, version, name, nodes, cycles, packets, notes_length,
+     num_regions) = HEADER.unpack(f.read(HEADER.size))
+    if magic != NT_MAGIC:
+        raise ValueError('not a netrace trace: bad magic')
+    notes = f.read(notes_length)
+    regions = [REGION.unpack(f.read(REGION.size)) for i in range(num_regions)]
+    return {'version': version, 'benchmark': name.split(b'\0')[0].decode(),
+            'nodes': nodes, 'cycles': cycles, 'packets': packets,
+            'notes': notes, 'regions': regions,
+            'size': HEADER.size + notes_length + REGION.size * num_regions}
+###############################################################################
+
+
+def write_header(f, header, regions):
+    """ Write a header with other regions, see read_header """
+    f.write(HEADER.pack(NT_MAGIC, header['version'],
+                        header['benchmark'].encode(), header['nodes'],
+                        header['cycles'], header['packets'],
+                        len(header['notes']), len(regions)))
+    f.write(header['notes'])
+    for region in regions:
+        f.write(REGION.pack(*region))
+###############################################################################
+
+
+def copy_bytes(src, dst, count):
+    """ Copy count bytes from src to dst, or up to the end of src if None """
+    while count is None or count > 0:
+        size = CHUNK if count is None else min(CHUNK, count)
+        data = src.read(size)
+        if not data:
+            return
+        if dst is not None:
+            dst.write(data)
+        if count is not None:
+            count -= len(data)
+###############################################################################
+
+
+def prepare_trace(trace, cache_dir, region=0, num_regions=None):
+    """
+    Decompress a netrace trace once into a seekable cache.
+
+    The cached trace holds the header and the packets from the start of
+    region on. The header keeps all region entries, so the region numbers
+    and the cycle counts of the simulator stay the same: the seek offsets
+    of the regions before region point to its start. The simulator reads
+    traces which do not end in .bz2 directly and seeks to the region
+    instead of decompressing the trace up to it.
+
+    Parameters:
+        - trace: the path of the .tra.bz2 trace.
+        - cache_dir: the folder of the cache.
+        - region: the first region to be kept, e.g. 2 for the PARSEC ROI.
+        - num_regions: the number of regions to be kept, all following
+        regions by default.
+
+    Return:
+        - The path of the cached trace. Its index, the regions of the header
+        as JSON, is next to it with the suffix .json.
+    """
+    stat = os.stat(trace)
+    key = hashlib.sha256(('%s:%d:%d:%d:%s' % (
+            os.path.abspath(trace), stat.st_size, stat.st_mtime_ns, region,
+            num_regions)).encode()).hexdigest()[:16]
+    name = os.path.basename(trace)
+    if name.endswith('.bz2'):
+        name = name[:-len('.bz2')]
+    cached = os.path.join(cache_dir, key + '_' + name)
+    if os.path.exists(cached):
+        return cached
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = cached + '.tmp' + str(os.getpid())
+    with bz2.open(trace, 'rb') as src, open(tmp, 'wb') as dst:
+        header = read_header(src)
+        offsets = [r[0] for r in header['regions']]
+        if not 0 <= region < len(offsets):
+            raise ValueError('the trace has no region ' + str(region))
+        start = offsets[region]
+        end = None
+        if num_regions is not None and region + num_regions < len(offsets):
+            end = offsets[region + num_regions]
+        length = None if end is None else end - start
+        regions = []
+        for offset, cycles, packets in header['regions']:
+            offset = max(offset - start, 0)
+            if length is not None:
+                offset = min(offset, length)
+            regions.append((offset, cycles, packets))
+        write_header(dst, header, regions)
+        copy_bytes(src, None, start)
+        copy_bytes(src, dst, length)
+    index = {'trace': os.path.abspath(trace), 'benchmark': header['benchmark'],
+             'nodes': header['nodes'], 'first_region': region,
+             'regions': [{'seek_offset': o, 'cycles': c, 'packets': p}
+                         for o, c, p in regions]}
+    with open(cached + '.json', 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, cached)
+    return cached
+###############################################################################
+
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='Decompress netrace traces into a seekable cache')
+    parser.add_argument('traces', nargs='+', help='the .tra.bz2 traces')
+    parser.add_argument('--cache', default='trace_cache',
+                        help='the folder of the cache')
+    parser.add_argument('--region', type=int, default=0,
+                        help='the first region to be kept')
+    parser.add_argument('--num-regions', type=int, default=None,
+                        help='the number of regions to be kept')
+    args = parser.parse_args()
+    for trace in args.traces:
+        print(prepare_trace(trace, args.cache, args.region, args.num_regions))
+
+
+if __name__ == '__main__':
+    main()
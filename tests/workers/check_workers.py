@@ -0,0 +1,132 @@
+#!/bin/python
+
+# Copyright 2018 Jan Moritz Joseph
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# This script checks bin/remote_workers.py with several sim_worker.py
+# processes on localhost. The simulator is replaced by a small script, so
+# the check runs without building it.
+###############################################################################
+import os
+import sys
+import shlex
+import tempfile
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'bin'))
+from remote_workers import WorkerPool
+###############################################################################
+# The simulator of the check. It writes the latencies of a run and the pid
+# of the worker which started it. A config containing <fail/> makes it exit
+# with an error, as a crashing simulator would.
+FAKE_SIM = """#!%s
+import os
+import sys
+config = open(sys.argv[1]).read()
+if '<fail />' in config:
+    sys.exit(3)
+with open('report_Performance.csv', 'w') as f:
+    f.write('avgFlitLat, 1.0\\navgPacketLat, 2.0\\navgNetworkLat, 3.0\\n')
+with open('report.txt', 'w') as f:
+    f.write(str(os.getppid()))
+"""
+CONFIG = ('<configuration><noc><nocFile>network.xml</nocFile></noc>'
+          '%s</configuration>')
+###############################################################################
+
+
+def write_files(tmp):
+    """ Write the simulator, a config, a failing config and a network """
+    sim = os.path.join(tmp, 'sim')
+    with open(sim, 'w') as f:
+        f.write(FAKE_SIM % sys.executable)
+    os.chmod(sim, 0o755)
+    files = {'config.xml': CONFIG % '', 'fail.xml': CONFIG % '<fail />',
+             'network.xml': '<network/>'}
+    for name, content in files.items():
+        with open(os.path.join(tmp, name), 'w') as f:
+            f.write(content)
+    return sim
+###############################################################################
+
+
+def run(pool, tmp, configName, simId):
+    """ Run one simulation on the pool and return its result directory """
+    simdir = os.path.join(tmp, 'sim' + str(simId))
+    os.makedirs(simdir)
+    pool.run(os.path.join(tmp, configName), os.path.join(tmp, 'network.xml'),
+             simdir)
+    return simdir
+###############################################################################
+
+
+def main():
+    parser = argparse.ArgumentParser(
+            description='Check the sweep workers on localhost')
+    parser.add_argument('--workers', type=int, default=3,
+                        help='the number of worker processes')
+    parser.add_argument('--jobs', type=int, default=2,
+                        help='the concurrent simulations per worker')
+    parser.add_argument('--runs', type=int, default=24,
+                        help='the number of simulations')
+    args = parser.parse_args()
+
+    worker = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          '..', '..', 'bin', 'sim_worker.py')
+    with tempfile.TemporaryDirectory() as tmp:
+        sim = write_files(tmp)
+        commands = [' '.join(shlex.quote(a) for a in [
+                sys.executable, worker, '--sim', sim, '--jobs',
+                str(args.jobs), '--workdir', tmp])
+                for i in range(args.workers)]
+        pool = WorkerPool(commands, sim)
+        try:
+            assert len(pool) == args.workers * args.jobs
+            with ThreadPoolExecutor(max_workers=len(pool)) as executor:
+                simdirs = list(executor.map(
+                        lambda i: run(pool, tmp, 'config.xml', i),
+                        range(args.runs)))
+            pids = set()
+            for simdir in simdirs:
+                with open(os.path.join(simdir, 'report_Performance.csv')) as f:
+                    assert f.read().startswith('avgFlitLat, 1.0')
+                with open(os.path.join(simdir, 'report.txt')) as f:
+                    pids.add(int(f.read()))
+            workerPids = {c.process.pid for c in pool.connections}
+            assert pids <= workerPids, 'runs from unknown workers'
+            assert len(pids) == args.workers, 'not all workers were used'
+            print('OK: ' + str(args.runs) + ' runs on ' + str(len(pids)) +
+                  ' workers')
+
+            try:
+                run(pool, tmp, 'fail.xml', args.runs)
+            except subprocess.CalledProcessError as e:
+                assert e.returncode == 3
+                print('OK: a failing simulator raises CalledProcessError')
+            else:
+                raise AssertionError('a failing simulator was not reported')
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+#!/bin/sh
+
+# Run sweep jobs on several sim_worker.py processes on localhost
+python3 check_workers.py "$@"